@@ -0,0 +1,350 @@
+"""
+Load generator for the Financial Advisor AI service
+
+Drives POST /analyze with synthetic users and reports latency percentiles,
+throughput and error rates. Runs either against a live server or, with
+``--app``, against the ASGI app in-process without a network.
+
+Examples:
+    # 32 closed-loop workers, 2000 requests against a running server
+    python load_test.py --url http://localhost:8080 --concurrency 32 --requests 2000
+
+    # Open-loop Poisson arrivals at 150 req/s for 60s, log-normal request sizes
+    python load_test.py --rate 150 --duration 60 --size-dist lognormal:50:1.0
+
+    # In-process against main.py's app
+    python load_test.py --app main:app --requests 500 --size-dist uniform:10:500
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+# API endpoint
+BASE_URL = "http://localhost:8080"
+JSON_HEADERS = {"content-type": "application/json"}
+
+SizeDistribution = Callable[[random.Random], int]
+
+
+def generate_sample_transactions(num_transactions=30,
+                                 rng: Optional[random.Random] = None):
+    """Generate sample transaction data"""
+    rng = rng or random.Random()
+    categories = [
+        "Salary", "Investment", "Superannuation",
+        "Housing", "Transport", "Food",
+        "Entertainment", "Healthcare", "Education"
+    ]
+
+    transactions = []
+    base_date = datetime.now() - timedelta(days=90)
+
+    for _ in range(num_transactions):
+        # Generate random date within last 90 days
+        date = base_date + timedelta(days=rng.randint(0, 90))
+
+        # Generate random amount (positive for income, negative for expenses)
+        is_income = rng.random() < 0.2  # 20% chance of being income
+        amount = rng.uniform(10, 1000) * (1 if is_income else -1)
+
+        # Select random category
+        category = rng.choice(categories)
+
+        transactions.append({
+            "date": date.isoformat(),
+            "amount": round(amount, 2),
+            "category": category,
+            "description": f"Sample {category} transaction"
+        })
+
+    return transactions
+
+def generate_sample_user_profile():
+    """Generate sample user profile data"""
+    return {
+        "age": 35,
+        "annual_income": 85000,
+        "super_balance": 150000,
+        "emergency_fund": 20000,
+        "investment_assets": 50000,
+        "super_contributions": 10000,
+        "work_expenses": 5000,
+        "investment_diversity": 2
+    }
+
+def parse_size_distribution(spec: str) -> SizeDistribution:
+    """
+    Parse a transactions-per-request distribution
+
+    ``fixed:N``, ``uniform:LO:HI``, ``lognormal:MEDIAN:SIGMA`` or
+    ``choice:N1,N2,...``
+    """
+    kind, _, params = spec.partition(':')
+    try:
+        if kind == 'fixed':
+            n = int(params)
+            return lambda rng: n
+        if kind == 'uniform':
+            low, high = (int(p) for p in params.split(':'))
+            return lambda rng: rng.randint(low, high)
+        if kind == 'lognormal':
+            median, sigma = (float(p) for p in params.split(':'))
+            mu = math.log(median)
+            return lambda rng: max(1, round(rng.lognormvariate(mu, sigma)))
+        if kind == 'choice':
+            sizes = [int(p) for p in params.split(',')]
+            return lambda rng: rng.choice(sizes)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid size distribution: {spec!r}")
+
+@dataclass
+class LoadTestResult:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    transactions_sent: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values()) + sum(self.errors.values())
+
+    @property
+    def failures(self) -> int:
+        http_errors = sum(n for status, n in self.statuses.items() if status >= 400)
+        return http_errors + sum(self.errors.values())
+
+    def summary(self) -> Dict[str, Any]:
+        """Latency percentiles (ms), throughput and error rate"""
+        latencies = np.asarray(self.latencies) * 1000
+        if len(latencies):
+            values = np.percentile(latencies, [50, 95, 99]).round(2).tolist()
+            percentiles = dict(zip(('p50', 'p95', 'p99'), values))
+        else:
+            percentiles = {'p50': None, 'p95': None, 'p99': None}
+        elapsed = self.elapsed
+        return {
+            "requests": self.requests,
+            "successes": self.requests - self.failures,
+            "failures": self.failures,
+            "error_rate": self.failures / self.requests if self.requests else 0.0,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(self.requests / elapsed, 2) if elapsed else 0.0,
+            "transactions_per_s": (
+                round(self.transactions_sent / elapsed, 1) if elapsed else 0.0
+            ),
+            "latency_ms": {
+                **percentiles,
+                "mean": round(float(latencies.mean()), 2) if len(latencies) else None,
+                "max": round(float(latencies.max()), 2) if len(latencies) else None,
+            },
+            "status_codes": {
+                str(status): n for status, n in sorted(self.statuses.items())
+            },
+            "exceptions": dict(self.errors),
+        }
+
+class LoadGenerator:
+    """
+    Send /analyze requests with either a fixed number of closed-loop workers
+    (``rate=None``) or open-loop Poisson arrivals at ``rate`` requests/s
+
+    In open-loop mode latency is measured from each request's scheduled arrival
+    time, so time spent waiting for a free connection slot counts against the
+    service rather than being hidden (no coordinated omission).
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        size_distribution: SizeDistribution,
+        concurrency: int = 10,
+        rate: Optional[float] = None,
+        requests: Optional[int] = None,
+        duration: Optional[float] = None,
+        payload_pool: int = 100,
+        seed: Optional[int] = None,
+    ):
+        if requests is None and duration is None:
+            raise ValueError("Either requests or duration must be set")
+        self.client = client
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_requests = requests
+        self.duration = duration
+        self.rng = random.Random(seed)
+
+        # Payloads are generated and JSON-encoded up front so the generator's
+        # own CPU time doesn't leak into the measured latencies
+        profile = generate_sample_user_profile()
+        self.payloads = []
+        for _ in range(payload_pool):
+            transactions = generate_sample_transactions(
+                size_distribution(self.rng), self.rng
+            )
+            body = json.dumps({"transactions": transactions, "user_profile": profile})
+            self.payloads.append((len(transactions), body.encode()))
+
+        self.result = LoadTestResult()
+        self._issued = 0
+        self._deadline = math.inf
+
+    async def run(self) -> LoadTestResult:
+        start = time.perf_counter()
+        if self.duration is not None:
+            self._deadline = start + self.duration
+        if self.rate is None:
+            await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+        else:
+            await self._open_loop(start)
+        self.result.elapsed = time.perf_counter() - start
+        return self.result
+
+    def _next_request(self) -> bool:
+        if self.max_requests is not None and self._issued >= self.max_requests:
+            return False
+        if time.perf_counter() >= self._deadline:
+            return False
+        self._issued += 1
+        return True
+
+    async def _worker(self) -> None:
+        while self._next_request():
+            await self._send(time.perf_counter())
+
+    async def _open_loop(self, start: float) -> None:
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        scheduled = start
+
+        async def send_when_free(scheduled_at: float) -> None:
+            async with slots:
+                await self._send(scheduled_at)
+
+        while True:
+            scheduled += self.rng.expovariate(self.rate)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._next_request():
+                break
+            tasks.append(asyncio.ensure_future(send_when_free(scheduled)))
+        await asyncio.gather(*tasks)
+
+    async def _send(self, started: float) -> None:
+        size, body = self.rng.choice(self.payloads)
+        try:
+            response = await self.client.post(
+                "/analyze", content=body, headers=JSON_HEADERS
+            )
+        except httpx.HTTPError as e:
+            self.result.errors[type(e).__name__] += 1
+            return
+        self.result.latencies.append(time.perf_counter() - started)
+        self.result.statuses[response.status_code] += 1
+        self.result.transactions_sent += size
+
+def load_app(target: str) -> Any:
+    """Import an ASGI app from a ``module:attribute`` string"""
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute or 'app')
+
+def make_client(url: str = BASE_URL, app: Any = None, concurrency: int = 10,
+                timeout: float = 30.0) -> httpx.AsyncClient:
+    """HTTP client for a live server, or an in-process one when ``app`` is given"""
+    if app is not None:
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadtest",
+            timeout=timeout
+        )
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    return httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout)
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    latency = summary["latency_ms"]
+    lines = [
+        f"Requests:     {summary['requests']} ({summary['failures']} failed, "
+        f"{summary['error_rate']:.2%} error rate)",
+        f"Elapsed:      {summary['elapsed_s']}s",
+        f"Throughput:   {summary['throughput_rps']} req/s "
+        f"({summary['transactions_per_s']} transactions/s)",
+        f"Latency (ms): p50={latency['p50']} p95={latency['p95']} "
+        f"p99={latency['p99']} mean={latency['mean']} max={latency['max']}",
+        f"Status codes: {summary['status_codes']}",
+    ]
+    if summary["exceptions"]:
+        lines.append(f"Exceptions:   {summary['exceptions']}")
+    return "\n".join(lines)
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    app = load_app(args.app) if args.app else None
+    async with make_client(args.url, app, args.concurrency, args.timeout) as client:
+        generator = LoadGenerator(
+            client,
+            parse_size_distribution(args.size_dist),
+            concurrency=args.concurrency,
+            rate=args.rate,
+            requests=args.requests,
+            duration=args.duration,
+            payload_pool=args.payload_pool,
+            seed=args.seed,
+        )
+        result = await generator.run()
+    return result.summary()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load test the Financial Advisor AI /analyze endpoint"
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default=BASE_URL,
+                        help=f"Base URL of a running service (default: {BASE_URL})")
+    target.add_argument("--app",
+                        help="Run in-process against an ASGI app, e.g. main:app")
+    parser.add_argument(
+        "--concurrency", type=int, default=10,
+        help="Closed-loop workers, or max in-flight requests with --rate"
+    )
+    parser.add_argument("--rate", type=float,
+                        help="Open-loop Poisson arrival rate in requests/s")
+    parser.add_argument("--requests", type=int, help="Total requests to send")
+    parser.add_argument("--duration", type=float, help="Seconds to run for")
+    parser.add_argument("--size-dist", default="fixed:30",
+                        help="Transactions per request: fixed:N, uniform:LO:HI, "
+                             "lognormal:MEDIAN:SIGMA, choice:A,B,...")
+    parser.add_argument("--payload-pool", type=int, default=100,
+                        help="Distinct payloads to pre-generate")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int,
+                        help="Random seed for reproducible payloads and arrivals")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 100
+    return args
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    summary = asyncio.run(run_load_test(args))
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+if __name__ == "__main__":
+    main()
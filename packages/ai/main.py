@@ -1,16 +1,20 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import uvicorn
 from dotenv import load_dotenv
 import os
-from datetime import datetime
 from src.models.financial_advisor import FinancialAdvisor
+from src.models.registry import ModelWatcher
+from src.services.analysis_service import AnalysisService
+from src.schemas import TransactionValidationError, decode_analysis_request, parse_json
+from src.utils.profiling import ProfilingMiddleware, profiling_options_from_env
 import logging
 from logging.config import dictConfig
 from src.config.logging import LogConfig
 import asyncio
+from contextlib import asynccontextmanager
 
 # Load environment variables
 load_dotenv()
@@ -24,12 +28,24 @@ PORT = int(os.getenv('PORT', '8080'))  # Changed default port to 8080
 HOST = os.getenv('HOST', '0.0.0.0')
 DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
 ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000,http://localhost:8000').split(',')
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '32'))
+BATCH_WINDOW_MS = float(os.getenv('BATCH_WINDOW_MS', '5'))
+# Seconds between checks for a new model version; 0 disables hot-swapping
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '30'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MODEL_WATCH_INTERVAL > 0:
+        model_watcher.start()
+    yield
+    model_watcher.stop()
 
 app = FastAPI(
     title="Financial Advisor AI",
     description="AI-powered financial advisory system for Australian users",
     version="1.0.0",
-    debug=DEBUG
+    debug=DEBUG,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -41,60 +57,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the financial advisor
+# Opt-in request profiling (PROFILING_ADMIN_TOKEN / PROFILING_SAMPLE_RATE); not
+# installed at all when neither is set
+PROFILING_OPTIONS = profiling_options_from_env()
+if PROFILING_OPTIONS:
+    app.add_middleware(ProfilingMiddleware, **PROFILING_OPTIONS)
+
+# Initialize the financial advisor behind the micro-batching analysis service
 advisor = FinancialAdvisor()
+analysis_service = AnalysisService(
+    advisor, max_batch_size=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS
+)
 
-# Models
-class Transaction(BaseModel):
-    date: datetime
-    amount: float
-    category: str
-    description: str
+# Hot-swap newly published model versions without restarting the worker
+model_watcher = ModelWatcher(advisor, interval=MODEL_WATCH_INTERVAL)
 
+# Models
 class FinancialAnalysis(BaseModel):
     tax_optimization: List[str]
     retirement_planning: List[str]
     risk_assessment: str
     confidence_score: float
 
-class UserProfile(BaseModel):
-    age: int
-    annual_income: float
-    super_balance: float
-    emergency_fund: float
-    investment_assets: float
-    super_contributions: float
-    work_expenses: float
-    investment_diversity: int
+# Request bodies are parsed by hand, so document them explicitly
+JSON_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"type": "object"}}}
+    }
+}
 
-class AnalysisRequest(BaseModel):
-    transactions: List[Transaction]
-    user_profile: UserProfile
+async def read_body(request: Request) -> bytes:
+    # Unlike request.body(), streaming doesn't keep a copy on the request
+    return b"".join([chunk async for chunk in request.stream()])
 
 # Routes
 @app.get("/")
 async def root():
     return {"message": "Australian Financial Adviser AI Service"}
 
-@app.post("/analyze", response_model=Dict[str, Any])
-async def analyze_finances(request: AnalysisRequest):
+@app.post("/analyze", response_model=Dict[str, Any], openapi_extra=JSON_BODY)
+async def analyze_finances(request: Request):
     """
     Analyze financial transactions and provide comprehensive advice
+
+    The body is ``{"transactions": [...], "user_profile": {...}}``. It is read
+    raw and parsed with each transaction compacted into a tuple, then decoded
+    into a TransactionBatch; neither the body nor the parsed JSON outlive the
+    decoding.
     """
     try:
-        # Convert transactions to list of dictionaries
-        transactions = [t.dict() for t in request.transactions]
-        
-        # Convert user profile to dictionary
-        user_profile = request.user_profile.dict()
-        
+        transactions, user_profile = decode_analysis_request(
+            parse_json(await read_body(request))
+        )
+    except TransactionValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+
+    try:
         # Add data time span for confidence calculation
-        if transactions:
-            dates = [t['date'] for t in transactions]
-            user_profile['data_time_span_months'] = (max(dates) - min(dates)).days / 30
+        if len(transactions):
+            user_profile['data_time_span_months'] = transactions.time_span_days() / 30
         
         # Get advice from the financial advisor
-        advice = advisor.analyze_transactions(transactions, user_profile)
+        advice = await analysis_service.analyze_transactions(transactions, user_profile)
         
         return {
             "status": "success",
@@ -113,7 +138,17 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "1.0.0",
-        "model_ready": True
+        "model_ready": True,
+        "model_version": advisor.model_version
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Request batching metrics
+    """
+    return {
+        "batching": analysis_service.batching_stats()
     }
 
 async def main():
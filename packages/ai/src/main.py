@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
@@ -6,8 +6,12 @@ import uvicorn
 from dotenv import load_dotenv
 import os
 import logging
-from services.analysis_service import AnalysisService
-from utils.data_processor import DataProcessor
+from contextlib import asynccontextmanager
+from src.models.registry import ModelWatcher
+from src.schemas import TransactionBatch, TransactionValidationError, parse_json
+from src.services.analysis_service import AnalysisService
+from src.utils.data_processor import DataProcessor
+from src.utils.profiling import ProfilingMiddleware, profiling_options_from_env
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,10 +20,21 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Seconds between checks for a new model version; 0 disables hot-swapping
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 30))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MODEL_WATCH_INTERVAL > 0:
+        model_watcher.start()
+    yield
+    model_watcher.stop()
+
 app = FastAPI(
     title="Australian Financial Adviser AI",
     description="AI service for financial advice and analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -31,17 +46,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling, only installed when configured
+profiling_options = profiling_options_from_env()
+if profiling_options:
+    app.add_middleware(ProfilingMiddleware, **profiling_options)
+
 # Initialize services
-analysis_service = AnalysisService()
+analysis_service = AnalysisService(
+    max_batch_size=int(os.getenv("BATCH_MAX_SIZE", 32)),
+    window_ms=float(os.getenv("BATCH_WINDOW_MS", 5))
+)
 data_processor = DataProcessor()
 
-# Models
-class Transaction(BaseModel):
-    amount: float
-    category: str
-    date: str
-    merchant: str
+# Hot-swap newly published model versions without restarting the worker
+model_watcher = ModelWatcher(analysis_service.advisor, interval=MODEL_WATCH_INTERVAL)
 
+# Models
 class FinancialAnalysis(BaseModel):
     tax_optimization: List[str]
     retirement_planning: List[str]
@@ -56,14 +76,25 @@ class FinancialAnalysis(BaseModel):
 async def root():
     return {"message": "Australian Financial Adviser AI Service"}
 
-@app.post("/analyze", response_model=FinancialAnalysis)
-async def analyze_transactions(transactions: List[Transaction]):
+@app.post("/analyze", response_model=FinancialAnalysis, openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"type": "array"}}}
+    }
+})
+async def analyze_transactions(request: Request):
+    # Decode the raw body into the shared compact schema ("merchant" is accepted
+    # for "description") without keeping a dict per transaction around
+    body = b"".join([chunk async for chunk in request.stream()])
+    try:
+        batch = TransactionBatch.from_records(parse_json(body), loc=("body",))
+    except TransactionValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    del body
+
     try:
-        # Convert Pydantic models to dictionaries
-        transaction_dicts = [t.dict() for t in transactions]
-        
         # Normalize categories
-        normalized_transactions = data_processor.normalize_categories(transaction_dicts)
+        normalized_transactions = data_processor.normalize_categories(batch)
         
         # Get analysis from the service
         analysis = await analysis_service.analyze_transactions(normalized_transactions)
@@ -81,7 +112,7 @@ async def analyze_transactions(transactions: List[Transaction]):
 
 if __name__ == "__main__":
     uvicorn.run(
-        "main:app",
+        "src.main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 5000)),
         reload=True
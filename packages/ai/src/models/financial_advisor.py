@@ -5,60 +5,120 @@ from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Hashable, Mapping, Optional, Sequence, Tuple, Union
 import joblib
 import os
 from datetime import datetime, timedelta
 import logging
 import json
+import threading
+from dataclasses import replace
+
+from ..schemas.transactions import TransactionBatch, transaction_amounts
+from .forecasting import CashFlowForecaster
+from .registry import MODEL_NAMES, ModelRegistry, ModelSet
+from ..utils.segments import segment_ids, segment_masked_stats
+from ..utils.chunked_analytics import (
+    ChunkedAnalyzer,
+    HistorySource,
+    analyzer_options_from_env,
+)
 
 logger = logging.getLogger(__name__)
 
-class FinancialAdvisor:
-    def __init__(self, model_path: str = None):
-        self.model_path = model_path or os.getenv('MODEL_PATH', './models/financial_advisor')
-        
-        # Initialize ML models
-        self._init_ml_models()
-        
-        # Load Australian financial regulations
-        self._load_financial_regulations()
-        
-        # Initialize rule-based systems
-        self._init_rule_based_systems()
-        
-        # Load models if they exist
-        self._load_models_if_exist()
+Transactions = Union[TransactionBatch, List[Dict[str, Any]]]
 
-    def _init_ml_models(self):
-        """Initialize machine learning models for different tasks"""
+def _model_property(name: str) -> property:
+    """Expose one estimator of the active ModelSet as an advisor attribute"""
+    def get(self: 'FinancialAdvisor') -> Any:
+        return getattr(self.models, name)
+
+    def set(self: 'FinancialAdvisor', model: Any) -> None:
+        # A hand-assembled set no longer matches any published version
+        self.install_models(replace(self.models, version=None, **{name: model}))
+
+    return property(get, set)
+
+def default_models() -> ModelSet:
+    """Untrained models with the advisor's default hyperparameters"""
+    return ModelSet(
         # Spending Pattern Classifier
-        self.spending_classifier = RandomForestClassifier(
+        spending_classifier=RandomForestClassifier(
             n_estimators=200,
             max_depth=15,
             random_state=42
-        )
-        
+        ),
+
         # Savings Behavior Predictor
-        self.savings_predictor = GradientBoostingRegressor(
+        savings_predictor=GradientBoostingRegressor(
             n_estimators=100,
             max_depth=5,
             random_state=42
-        )
-        
+        ),
+
         # Risk Assessment Model
-        self.risk_assessor = RandomForestClassifier(
+        risk_assessor=RandomForestClassifier(
             n_estimators=150,
             max_depth=10,
             random_state=42
-        )
-        
+        ),
+
         # Tax Optimization Model
-        self.tax_optimizer = GradientBoostingRegressor(
+        tax_optimizer=GradientBoostingRegressor(
             n_estimators=100,
             max_depth=5,
             random_state=42
         )
+    )
+
+class FinancialAdvisor:
+    def __init__(self, model_path: str = None):
+        self.model_path = model_path or os.getenv('MODEL_PATH', './models/financial_advisor')
+        self.registry = ModelRegistry(self.model_path)
+        self._models_lock = threading.Lock()
+
+        # Cash-flow forecasting, corrected by the savings predictor once fitted
+        self.forecaster = CashFlowForecaster()
+        
+        # Initialize ML models
+        self._init_ml_models()
+        
+        # Load Australian financial regulations
+        self._load_financial_regulations()
+        
+        # Initialize rule-based systems
+        self._init_rule_based_systems()
+        
+        # Load models if they exist
+        self._load_models_if_exist()
+
+    def _init_ml_models(self):
+        """Initialize machine learning models for different tasks"""
+        self.models = default_models()
+
+    spending_classifier = _model_property('spending_classifier')
+    savings_predictor = _model_property('savings_predictor')
+    risk_assessor = _model_property('risk_assessor')
+    tax_optimizer = _model_property('tax_optimizer')
+
+    @property
+    def model_version(self) -> Optional[str]:
+        """
+        Registry version of the active models, or None if they were not loaded
+        from one
+        """
+        return self.models.version
+
+    def install_models(self, models: ModelSet):
+        """
+        Make ``models`` the active model set
+
+        This is a single reference assignment, so it is atomic: callers that read
+        ``self.models`` before the swap keep using the previous set until they finish.
+        """
+        with self._models_lock:
+            self.models = models
+        self.forecaster.cache.clear()
 
     def _load_financial_regulations(self):
         """Load Australian financial regulations and rules"""
@@ -139,14 +199,48 @@ class FinancialAdvisor:
             ]
         }
 
-    def analyze_transactions(self, transactions: List[Dict[str, Any]], user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_transactions(self, transactions: Transactions,
+                             user_profile: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze financial transactions and provide comprehensive advice
+
+        ``transactions`` may be a list of transaction dicts or a TransactionBatch.
         """
         try:
+            return self.analyze_batch([(transactions, user_profile)])[0]
+
+        except Exception as e:
+            logger.error(f"Error in analyze_transactions: {str(e)}")
+            raise
+
+    def analyze_batch(
+        self, requests: Sequence[Tuple[Transactions, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several users' transactions in one vectorized pass
+
+        The amounts of every request are concatenated into a single segmented
+        array so the per-user metrics cost a handful of NumPy calls for the whole
+        batch instead of a handful per request. Results are returned in the
+        order of ``requests``.
+        """
+        segments = [transaction_amounts(transactions) for transactions, _ in requests]
+        amounts = np.concatenate(segments) if segments else np.empty(0)
+        ids = segment_ids([len(segment) for segment in segments])
+
+        n = len(requests)
+        _, incomes, income_volatility = segment_masked_stats(
+            amounts, amounts > 0, ids, n
+        )
+        _, expenses, expense_volatility = segment_masked_stats(
+            -amounts, amounts < 0, ids, n
+        )
+
+        results = []
+        for i, (transactions, user_profile) in enumerate(requests):
             # Calculate basic metrics
-            total_income = sum(t['amount'] for t in transactions if t['amount'] > 0)
-            total_expenses = abs(sum(t['amount'] for t in transactions if t['amount'] < 0))
+            total_income = float(incomes[i])
+            total_expenses = float(expenses[i])
             savings_rate = (total_income - total_expenses) / total_income if total_income > 0 else 0
 
             # Generate tax optimization advice
@@ -156,12 +250,14 @@ class FinancialAdvisor:
             retirement_advice = self._generate_retirement_advice(user_profile, savings_rate)
 
             # Generate risk assessment
-            risk_assessment = self._assess_risk(user_profile, transactions)
+            risk_assessment = self._classify_risk(
+                user_profile, income_volatility[i], expense_volatility[i]
+            )
 
             # Calculate confidence score
             confidence_score = self._calculate_confidence_score(transactions, user_profile)
 
-            return {
+            results.append({
                 "tax_optimization": tax_advice,
                 "retirement_planning": retirement_advice,
                 "risk_assessment": risk_assessment,
@@ -171,11 +267,68 @@ class FinancialAdvisor:
                     "total_expenses": total_expenses,
                     "savings_rate": savings_rate
                 }
+            })
+
+        return results
+
+    def analyze_history(
+        self,
+        source: HistorySource,
+        user_profile: Dict[str, Any],
+        analyzer: Optional[ChunkedAnalyzer] = None
+    ) -> Dict[str, Any]:
+        """
+        ``analyze_transactions`` for a history read in chunks from a CSV/Parquet
+        file or a chunk source, for accounts too long to hold in memory
+
+        Memory use is bounded by the analyzer's chunk size (ANALYTICS_* settings
+        unless an ``analyzer`` is given).
+        """
+        analyzer = analyzer or ChunkedAnalyzer(**analyzer_options_from_env())
+        aggregate = analyzer.aggregate(source)
+
+        total_income = aggregate.income.total
+        total_expenses = aggregate.expenses.total
+        savings_rate = aggregate.savings_rate if total_income > 0 else 0
+        income_volatility = aggregate.income.std() if aggregate.income.count else 0
+        expense_volatility = aggregate.expenses.std() if aggregate.expenses.count else 0
+
+        return {
+            "tax_optimization": self._generate_tax_advice(user_profile, total_income),
+            "retirement_planning": self._generate_retirement_advice(
+                user_profile, savings_rate
+            ),
+            "risk_assessment": self._classify_risk(
+                user_profile, income_volatility, expense_volatility
+            ),
+            "confidence_score": self._confidence_score(
+                aggregate.transaction_count, user_profile
+            ),
+            "metrics": {
+                "total_income": total_income,
+                "total_expenses": total_expenses,
+                "savings_rate": savings_rate
             }
+        }
 
-        except Exception as e:
-            self.logger.error(f"Error in analyze_transactions: {str(e)}")
-            raise
+    def forecast_savings(
+        self,
+        histories: Mapping[Hashable, Transactions],
+        horizon_months: int = 6,
+        as_of: Optional[str] = None
+    ) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Forecast monthly net cash flow for the next ``horizon_months`` months for
+        every user in ``histories`` (user id -> transactions)
+
+        Forecasts are cached per user and recomputed when the user's
+        transactions change.
+        """
+        # Read the model once so a concurrent hot-swap can't change it mid-forecast
+        savings_predictor = self.models.savings_predictor
+        return self.forecaster.forecast_many(
+            histories, horizon_months, model=savings_predictor, as_of=as_of
+        )
 
     def _generate_tax_advice(self, user_profile: Dict[str, Any], total_income: float) -> List[str]:
         """Generate tax optimization advice based on user profile and income"""
@@ -213,16 +366,9 @@ class FinancialAdvisor:
         
         return advice
 
-    def _assess_risk(self, user_profile: Dict[str, Any], transactions: List[Dict[str, Any]]) -> str:
-        """Assess financial risk based on user profile and transactions"""
-        # Calculate income volatility
-        income_transactions = [t['amount'] for t in transactions if t['amount'] > 0]
-        income_volatility = np.std(income_transactions) if income_transactions else 0
-        
-        # Calculate expense volatility
-        expense_transactions = [abs(t['amount']) for t in transactions if t['amount'] < 0]
-        expense_volatility = np.std(expense_transactions) if expense_transactions else 0
-        
+    def _classify_risk(self, user_profile: Dict[str, Any], income_volatility: float,
+                       expense_volatility: float) -> str:
+        """Map income/expense volatility and emergency fund cover to a risk level"""
         # Assess risk level
         if income_volatility > 0.3 or expense_volatility > 0.3:
             return "High risk: Significant income or expense volatility detected"
@@ -231,8 +377,13 @@ class FinancialAdvisor:
         else:
             return "Low risk: Stable financial situation"
 
-    def _calculate_confidence_score(self, transactions: List[Dict[str, Any]], user_profile: Dict[str, Any]) -> float:
+    def _calculate_confidence_score(self, transactions: Transactions,
+                                    user_profile: Dict[str, Any]) -> float:
         """Calculate confidence score based on data quality and completeness"""
+        return self._confidence_score(len(transactions), user_profile)
+
+    def _confidence_score(self, transaction_count: int,
+                          user_profile: Dict[str, Any]) -> float:
         score = 0.0
         
         # Data time span
@@ -247,11 +398,11 @@ class FinancialAdvisor:
                 score += 0.1
         
         # Transaction count
-        if len(transactions) >= 100:
+        if transaction_count >= 100:
             score += 0.3
-        elif len(transactions) >= 50:
+        elif transaction_count >= 50:
             score += 0.2
-        elif len(transactions) >= 20:
+        elif transaction_count >= 20:
             score += 0.1
         
         # Profile completeness
@@ -261,32 +412,47 @@ class FinancialAdvisor:
         
         return min(1.0, score)
 
-    def save_models(self):
-        """Save the trained models and configuration"""
-        os.makedirs(self.model_path, exist_ok=True)
-        
-        # Save ML models
-        joblib.dump(self.spending_classifier, os.path.join(self.model_path, 'spending_classifier.joblib'))
-        joblib.dump(self.savings_predictor, os.path.join(self.model_path, 'savings_predictor.joblib'))
-        joblib.dump(self.risk_assessor, os.path.join(self.model_path, 'risk_assessor.joblib'))
-        joblib.dump(self.tax_optimizer, os.path.join(self.model_path, 'tax_optimizer.joblib'))
-        
-        # Save regulations and rules
-        with open(os.path.join(self.model_path, 'regulations.json'), 'w') as f:
-            json.dump(self.regulations, f)
-        
-        with open(os.path.join(self.model_path, 'rules.json'), 'w') as f:
-            json.dump(self.rules, f)
+    def save_models(self) -> str:
+        """
+        Publish the current models and configuration as a new registry version
+
+        Returns the version name. Serving processes pick the version up through
+        a ModelWatcher without restarting.
+        """
+        models = self.models
+        version = self.registry.publish(
+            models,
+            # The rules are code and are rebuilt on start-up
+            extra_files={'regulations.json': self.regulations}
+        )
+        with self._models_lock:
+            # A watcher may have swapped in another set while we were publishing;
+            # that one stays active
+            if self.models is models:
+                self.models = replace(models, version=version)
+        self.registry.prune()
+        return version
 
     def _load_models_if_exist(self):
-        """Load saved models if they exist in the model path"""
+        """
+        Load the current registry version, or models saved flat in the model
+        path by older releases
+        """
         try:
-            if os.path.exists(self.model_path):
-                self.spending_classifier = joblib.load(os.path.join(self.model_path, 'spending_classifier.joblib'))
-                self.savings_predictor = joblib.load(os.path.join(self.model_path, 'savings_predictor.joblib'))
-                self.risk_assessor = joblib.load(os.path.join(self.model_path, 'risk_assessor.joblib'))
-                self.tax_optimizer = joblib.load(os.path.join(self.model_path, 'tax_optimizer.joblib'))
+            version = self.registry.current_version()
+            if version is not None:
+                self.install_models(self.registry.load(version))
+                logger.info(f"Successfully loaded saved models (version {version})")
+                return
+            flat_files = {
+                name: os.path.join(self.model_path, f"{name}.joblib")
+                for name in MODEL_NAMES
+            }
+            if os.path.exists(flat_files['spending_classifier']):
+                self.install_models(ModelSet(**{
+                    name: joblib.load(path) for name, path in flat_files.items()
+                }))
                 logger.info("Successfully loaded saved models")
         except Exception as e:
             logger.warning(f"Could not load saved models: {str(e)}")
-            logger.info("Using newly initialized models instead") 
\ No newline at end of file
+            logger.info("Using newly initialized models instead")
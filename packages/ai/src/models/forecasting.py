@@ -0,0 +1,368 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sklearn.base import BaseEstimator
+
+from ..schemas.transactions import TransactionBatch
+from ..utils.segments import segment_ids
+
+logger = logging.getLogger(__name__)
+
+Transactions = Union[TransactionBatch, List[Dict[str, Any]]]
+
+MAX_HORIZON = 12
+
+RESIDUAL_FEATURES = [
+    'horizon',
+    'calendar_month',
+    'level',
+    'last_month',
+    'trailing_3_month_mean',
+    'volatility',
+    'history_months',
+    'seasonal_offset',
+]
+
+
+class ForecastCache:
+    """
+    LRU cache of per-user forecasts
+
+    Entries are stored with a fingerprint of the user's history (a hash of
+    every transaction's date and amount) and of the model that produced them,
+    so a forecast is recomputed as soon as transactions are added or
+    corrected, or the model changes, even without an explicit ``invalidate``.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[tuple, Dict[str, Any]]]' = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, user_id: Hashable, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != key:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id: Hashable, key: tuple, forecast: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[user_id] = (key, forecast)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CashFlowForecaster:
+    """
+    Forecast monthly net cash flow for many users at once
+
+    Each user's transactions are bucketed into a users x months matrix. The
+    baseline forecast is the user's deseasonalised recent level (mean of the
+    last ``level_window`` months with their calendar-month offsets removed)
+    plus the target month's seasonal offset, all computed with array
+    operations across users. When a fitted residual model (the advisor's
+    ``savings_predictor``) is given, its correction for every user and horizon
+    comes from a single batched ``predict`` call.
+    """
+
+    def __init__(self, history_months: int = 36, level_window: int = 6,
+                 cache_size: int = 100000):
+        self.history_months = history_months
+        self.level_window = level_window
+        self.cache = ForecastCache(cache_size)
+
+    def monthly_series(
+        self,
+        histories: Sequence[Transactions],
+        end_month: Optional[np.datetime64] = None
+    ) -> Tuple[np.ndarray, np.datetime64]:
+        """
+        Users x months matrix of net cash flow ending at ``end_month``
+
+        Months before a user's first transaction are NaN rather than 0 so they
+        don't drag the baseline down.
+        """
+        batches = [TransactionBatch.coerce(history) for history in histories]
+        lengths = [len(batch) for batch in batches]
+        n_users, n_months = len(batches), self.history_months
+
+        if batches:
+            months = np.concatenate([batch.dates for batch in batches])
+            amounts = np.concatenate([batch.amounts for batch in batches])
+        else:
+            months, amounts = np.empty(0, 'datetime64[ns]'), np.empty(0)
+        months = months.astype('datetime64[M]').astype(np.int64)
+
+        if end_month is None:
+            today = np.datetime64('today', 'M')
+            end = int(months.max()) if len(months) else int(today.astype(np.int64))
+        else:
+            end = int(np.datetime64(end_month, 'M').astype(np.int64))
+        start = end - n_months + 1
+
+        ids = segment_ids(lengths)
+        first = np.full(n_users, np.iinfo(np.int64).max)
+        np.minimum.at(first, ids, months)
+
+        keep = (months >= start) & (months <= end)
+        cells = ids[keep] * n_months + (months[keep] - start)
+        series = np.bincount(cells, weights=amounts[keep], minlength=n_users * n_months)
+        series = series.reshape(n_users, n_months)
+
+        column_months = start + np.arange(n_months)
+        series[column_months[None, :] < first[:, None]] = np.nan
+
+        return series, np.datetime64(end, 'M')
+
+    @staticmethod
+    def monthly_totals(history: Transactions) -> TransactionBatch:
+        """
+        One transaction per month holding that month's net cash flow
+
+        ``monthly_series`` gives the same result for this as for the full
+        history, so it can stand in for it where only forecasting needs it.
+        """
+        batch = TransactionBatch.coerce(history)
+        months, index = np.unique(
+            batch.dates.astype('datetime64[M]'), return_inverse=True
+        )
+        return TransactionBatch(
+            months.astype('datetime64[ns]'),
+            np.bincount(index, weights=batch.amounts, minlength=len(months)),
+            np.zeros(len(months), dtype=np.int32),
+            np.array(['monthly total'], dtype=object),
+            np.zeros(len(months), dtype=np.int32),
+            np.array(['monthly total'], dtype=object)
+        )
+
+    def baseline(self, series: np.ndarray, end_month: np.datetime64,
+                 horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Seasonal baseline (users x horizon) and the residual model's feature
+        rows (users * horizon x features, user-major) for series ending at
+        ``end_month``
+        """
+        n_users, n_months = series.shape
+        end = int(np.datetime64(end_month, 'M').astype(np.int64))
+        valid = ~np.isnan(series)
+        values = np.where(valid, series, 0.0)
+        history_months = valid.sum(axis=1)
+
+        overall = _safe_divide(values.sum(axis=1), history_months)
+        deviations = np.where(valid, series - overall[:, None], 0.0)
+        volatility = np.sqrt(
+            _safe_divide((deviations ** 2).sum(axis=1), history_months)
+        )
+        last_month = values[:, -1]
+        trailing = _safe_divide(values[:, -3:].sum(axis=1), valid[:, -3:].sum(axis=1))
+
+        # Calendar-month offsets from the user's mean. A month seen only once
+        # can't be told apart from noise, so it gets no offset.
+        calendar = (end - n_months + 1 + np.arange(n_months)) % 12
+        offsets = np.zeros((n_users, 12))
+        for month in range(12):
+            columns = calendar == month
+            seen = valid[:, columns].sum(axis=1)
+            mean_deviation = _safe_divide(deviations[:, columns].sum(axis=1), seen)
+            offsets[:, month] = np.where(seen > 1, mean_deviation, 0.0)
+
+        # The level is taken from deseasonalised months, otherwise a seasonal
+        # month inside the window would be counted again through its offset
+        deseasonalised = np.where(valid, series - offsets[:, calendar], 0.0)
+        recent_count = valid[:, -self.level_window:].sum(axis=1)
+        level = _safe_divide(
+            deseasonalised[:, -self.level_window:].sum(axis=1), recent_count
+        )
+
+        target_calendar = (end + 1 + np.arange(horizon)) % 12
+        seasonal = offsets[:, target_calendar]
+        baseline = level[:, None] + seasonal
+
+        features = np.empty((n_users, horizon, len(RESIDUAL_FEATURES)))
+        features[:, :, 0] = np.arange(1, horizon + 1)
+        features[:, :, 1] = target_calendar
+        features[:, :, 2] = level[:, None]
+        features[:, :, 3] = last_month[:, None]
+        features[:, :, 4] = trailing[:, None]
+        features[:, :, 5] = volatility[:, None]
+        features[:, :, 6] = history_months[:, None]
+        features[:, :, 7] = seasonal
+
+        return baseline, features.reshape(n_users * horizon, len(RESIDUAL_FEATURES))
+
+    def forecast(
+        self,
+        histories: Sequence[Transactions],
+        horizon: int = 6,
+        model: Optional[BaseEstimator] = None,
+        end_month: Optional[np.datetime64] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.datetime64]:
+        """
+        Forecast (users x horizon), seasonal baseline and the month the
+        forecast starts after
+        """
+        _check_horizon(horizon)
+        series, end = self.monthly_series(histories, end_month)
+        baseline, features = self.baseline(series, end, horizon)
+
+        forecast = baseline
+        if _is_fitted(model) and len(features):
+            forecast = baseline + model.predict(features).reshape(baseline.shape)
+        return forecast, baseline, end
+
+    def forecast_many(
+        self,
+        histories: Mapping[Hashable, Transactions],
+        horizon: int = 6,
+        model: Optional[BaseEstimator] = None,
+        as_of: Optional[str] = None,
+        chunk_size: int = 10000
+    ) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Cached forecasts keyed by user id
+
+        All users are forecast from the same month: ``as_of`` ("YYYY-MM") or the
+        latest transaction month across ``histories``. Users whose history is
+        unchanged since their last forecast are served from the cache; the rest
+        are computed ``chunk_size`` users at a time.
+        """
+        _check_horizon(horizon)
+        batches = {
+            user_id: TransactionBatch.coerce(history)
+            for user_id, history in histories.items()
+        }
+        if as_of is not None:
+            end = np.datetime64(as_of, 'M')
+        else:
+            latest = [batch.dates.max() for batch in batches.values() if len(batch)]
+            if latest:
+                end = max(latest).astype('datetime64[M]')
+            else:
+                end = np.datetime64('today', 'M')
+
+        results: Dict[Hashable, Dict[str, Any]] = {}
+        keys = {}
+        missing = []
+        # id(model) rather than "is fitted": a forecast still running on a
+        # swapped-out model must not be served to callers of the new one
+        model_key = id(model) if _is_fitted(model) else None
+        for user_id, batch in batches.items():
+            keys[user_id] = (_fingerprint(batch), horizon, str(end), model_key)
+            cached = self.cache.get(user_id, keys[user_id])
+            if cached is not None:
+                results[user_id] = cached
+            else:
+                missing.append(user_id)
+
+        months = [str(end + np.timedelta64(h, 'M')) for h in range(1, horizon + 1)]
+        for i in range(0, len(missing), chunk_size):
+            chunk = missing[i:i + chunk_size]
+            forecast, baseline, _ = self.forecast(
+                [batches[user_id] for user_id in chunk], horizon, model, end
+            )
+            cumulative = np.cumsum(forecast, axis=1)
+            for row, user_id in enumerate(chunk):
+                result = {
+                    "as_of": str(end),
+                    "months": months,
+                    "net_cash_flow": forecast[row].tolist(),
+                    "baseline": baseline[row].tolist(),
+                    "cumulative_savings": cumulative[row].tolist(),
+                    "model_adjusted": _is_fitted(model),
+                }
+                self.cache.put(user_id, keys[user_id], result)
+                results[user_id] = result
+
+        return results
+
+    def residual_training_set(
+        self,
+        histories: Sequence[Transactions],
+        horizon: int = MAX_HORIZON,
+        min_history: int = 3
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Backtest the baseline from every past month and collect
+        (features, actual - baseline) rows for months that were actually observed
+        """
+        _check_horizon(horizon)
+        series, end = self.monthly_series(histories)
+        n_months = series.shape[1]
+        end_index = int(end.astype(np.int64))
+
+        features, residuals = [], []
+        for origin in range(min_history - 1, n_months - 1):
+            steps = min(horizon, n_months - 1 - origin)
+            history = np.full_like(series, np.nan)
+            history[:, n_months - 1 - origin:] = series[:, :origin + 1]
+            origin_month = np.datetime64(end_index - (n_months - 1 - origin), 'M')
+            baseline, rows = self.baseline(history, origin_month, steps)
+
+            actual = series[:, origin + 1:origin + 1 + steps]
+            observed = (~np.isnan(series[:, :origin + 1])).sum(axis=1)
+            enough_history = observed >= min_history
+            usable = (~np.isnan(actual) & enough_history[:, None]).reshape(-1)
+            features.append(rows[usable])
+            residuals.append((actual - baseline).reshape(-1)[usable])
+
+        if not features:
+            return np.empty((0, len(RESIDUAL_FEATURES))), np.empty(0)
+        return np.vstack(features), np.concatenate(residuals)
+
+    def fit_residual_model(
+        self,
+        histories: Sequence[Transactions],
+        model: BaseEstimator,
+        horizon: int = MAX_HORIZON
+    ) -> BaseEstimator:
+        """
+        Fit ``model`` to the baseline's backtest residuals and drop cached
+        forecasts
+        """
+        features, residuals = self.residual_training_set(histories, horizon)
+        if not len(residuals):
+            raise ValueError("Not enough monthly history to fit the residual model")
+        model.fit(features, residuals)
+        self.cache.clear()
+        return model
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(numerator))
+    return np.divide(numerator, denominator, out=out, where=denominator > 0)
+
+
+def _fingerprint(batch: TransactionBatch) -> tuple:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(batch.dates).view(np.int64).tobytes())
+    digest.update(np.ascontiguousarray(batch.amounts).tobytes())
+    return (len(batch), digest.hexdigest())
+
+
+def _is_fitted(model: Optional[BaseEstimator]) -> bool:
+    return model is not None and hasattr(model, 'estimators_')
+
+
+def _check_horizon(horizon: int) -> None:
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HORIZON} months")
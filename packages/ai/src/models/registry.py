@@ -0,0 +1,261 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+if TYPE_CHECKING:
+    from .financial_advisor import FinancialAdvisor
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAMES = [
+    'spending_classifier',
+    'savings_predictor',
+    'risk_assessor',
+    'tax_optimizer',
+]
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+
+
+class ModelArtifactError(Exception):
+    """Raised when a model version is missing, incomplete or fails its checksums"""
+
+
+@dataclass(frozen=True)
+class ModelSet:
+    """The advisor's estimators, swapped as one unit"""
+
+    spending_classifier: Any
+    savings_predictor: Any
+    risk_assessor: Any
+    tax_optimizer: Any
+    version: Optional[str] = None
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts under ``root``
+
+    Each version lives in ``versions/<version>/`` with one joblib file per model
+    and a ``manifest.json`` listing the files' SHA-256 checksums. A version is
+    written to a temporary directory and renamed into place, and ``CURRENT``
+    (the active version's name) is replaced atomically afterwards, so readers
+    only ever see complete versions.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_dir)
+            if not name.startswith('.')
+            and os.path.exists(os.path.join(self.versions_dir, name, MANIFEST_FILE))
+        )
+
+    def publish(self, models: ModelSet, extra_files: Optional[Dict[str, Any]] = None,
+                activate: bool = True) -> str:
+        """
+        Write ``models`` (plus ``extra_files``: name -> JSON-serialisable data)
+        as a new version and optionally make it current
+        """
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        version = f"{timestamp}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = os.path.join(self.versions_dir, f".tmp-{version}")
+        os.makedirs(staging)
+
+        try:
+            files = {}
+            for name in MODEL_NAMES:
+                filename = f"{name}.joblib"
+                joblib.dump(getattr(models, name), os.path.join(staging, filename))
+                files[filename] = _sha256(os.path.join(staging, filename))
+            for filename, data in (extra_files or {}).items():
+                with open(os.path.join(staging, filename), 'w') as f:
+                    json.dump(data, f)
+                files[filename] = _sha256(os.path.join(staging, filename))
+
+            manifest = {
+                "version": version,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "models": MODEL_NAMES,
+                "files": files
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.rename(staging, os.path.join(self.versions_dir, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        logger.info(f"Published model version {version}")
+        return version
+
+    def activate(self, version: str) -> None:
+        """Point ``CURRENT`` at an existing version"""
+        if not os.path.exists(os.path.join(self.versions_dir, version, MANIFEST_FILE)):
+            raise ModelArtifactError(f"Model version {version} does not exist")
+        tmp_path = os.path.join(self.root, f".{CURRENT_FILE}.{uuid.uuid4().hex}")
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_FILE))
+
+    def load(self, version: str) -> ModelSet:
+        """Load a version after verifying every file against the manifest"""
+        directory = os.path.join(self.versions_dir, version)
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ModelArtifactError(
+                f"Model version {version} has no readable manifest: {str(e)}"
+            )
+
+        for filename, checksum in manifest['files'].items():
+            path = os.path.join(directory, filename)
+            if not os.path.exists(path) or _sha256(path) != checksum:
+                raise ModelArtifactError(
+                    f"Model version {version}: {filename} is missing or fails its "
+                    "checksum"
+                )
+
+        models = {
+            name: joblib.load(os.path.join(directory, f"{name}.joblib"))
+            for name in manifest['models']
+        }
+        return ModelSet(version=version, **models)
+
+    def prune(self, keep: int = 5) -> List[str]:
+        """Delete all but the newest ``keep`` versions, never the current one"""
+        current = self.current_version()
+        versions = self.versions()
+        removed = [
+            version for version in versions[:max(0, len(versions) - keep)]
+            if version != current
+        ]
+        for version in removed:
+            shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
+        return removed
+
+
+class ModelWatcher:
+    """
+    Background thread that hot-swaps the advisor's models when ``CURRENT`` changes
+
+    A new version is loaded into a second slot while the advisor keeps serving
+    the old one, warmed up with a few inferences per model, and then installed
+    with a single reference swap. Requests that already took the old ModelSet
+    finish on it. Versions that fail to load or warm up are logged and not
+    retried until ``CURRENT`` changes again.
+    """
+
+    def __init__(
+        self,
+        advisor: 'FinancialAdvisor',
+        registry: Optional[ModelRegistry] = None,
+        interval: float = 30.0,
+        warmup: Optional[Callable[[ModelSet], None]] = None
+    ):
+        self.advisor = advisor
+        self.registry = registry or advisor.registry
+        self.interval = interval
+        self.warmup = warmup or warm_up
+        self._failed: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='model-watcher', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self) -> bool:
+        """
+        Swap to the current version if it is new; returns True when a swap
+        happened
+        """
+        version = self.registry.current_version()
+        if version is None or version in (self.advisor.model_version, self._failed):
+            return False
+
+        try:
+            models = self.registry.load(version)
+            self.warmup(models)
+        except Exception as e:
+            logger.error(f"Not switching to model version {version}: {str(e)}")
+            self._failed = version
+            return False
+
+        previous = self.advisor.model_version
+        self.advisor.install_models(models)
+        logger.info(f"Switched models from version {previous} to {version}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Model watcher error: {str(e)}")
+
+
+def warm_up(models: ModelSet, rows: int = 8) -> None:
+    """
+    Run a few predictions through every fitted model so the first real request
+    doesn't pay for it
+    """
+    for name in MODEL_NAMES:
+        model = getattr(models, name)
+        n_features = getattr(model, 'n_features_in_', None)
+        if n_features is None:
+            continue
+        model.predict(np.zeros((rows, n_features)))
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
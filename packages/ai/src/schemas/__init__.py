@@ -0,0 +1,24 @@
+"""
+Financial Advisor Schemas
+
+This package contains the request schemas shared by the Financial Advisor AI services.
+"""
+
+from .requests import UserProfile, decode_analysis_request
+from .transactions import (
+    TransactionBatch,
+    TransactionRow,
+    TransactionValidationError,
+    parse_json,
+    transaction_amounts,
+)
+
+__all__ = [
+    "TransactionBatch",
+    "TransactionRow",
+    "TransactionValidationError",
+    "UserProfile",
+    "decode_analysis_request",
+    "parse_json",
+    "transaction_amounts",
+]
\ No newline at end of file
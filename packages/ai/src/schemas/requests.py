@@ -0,0 +1,47 @@
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, Tuple
+
+from .transactions import TransactionBatch, TransactionValidationError
+
+
+class UserProfile(BaseModel):
+    age: int
+    annual_income: float
+    super_balance: float
+    emergency_fund: float
+    investment_assets: float
+    super_contributions: float
+    work_expenses: float
+    investment_diversity: int
+
+
+def decode_analysis_request(payload: Any) -> Tuple[TransactionBatch, Dict[str, Any]]:
+    """
+    Validate an ``/analyze`` body of the form
+    ``{"transactions": [...], "user_profile": {...}}``
+
+    The single user profile goes through pydantic; the transactions are decoded
+    straight into a TransactionBatch.
+    """
+    if not isinstance(payload, dict):
+        raise TransactionValidationError([
+            {"loc": ["body"], "msg": "value is not a valid dict"}
+        ])
+    if 'transactions' not in payload or 'user_profile' not in payload:
+        raise TransactionValidationError([
+            {"loc": ["body", field], "msg": "field required"}
+            for field in ('transactions', 'user_profile') if field not in payload
+        ])
+
+    try:
+        user_profile = UserProfile.parse_obj(payload['user_profile']).dict()
+    except ValidationError as e:
+        raise TransactionValidationError([
+            {"loc": ["body", "user_profile", *error['loc']], "msg": error['msg']}
+            for error in e.errors()
+        ])
+
+    transactions = TransactionBatch.from_records(
+        payload['transactions'], loc=("body", "transactions")
+    )
+    return transactions, user_profile
@@ -0,0 +1,466 @@
+import json
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+# Values a transaction field may hold; lists, dicts and other containers are
+# rejected before the column-wise conversion, which would otherwise broadcast them
+_SCALAR_TYPES = (str, int, float, date, np.generic, type(None))
+
+# Location of a value in the payload, as in pydantic's error ``loc``
+Loc = Sequence[Union[str, int]]
+
+_FIELD_ERRORS = {
+    'date': "invalid datetime format",
+    'amount': "value is not a valid float",
+    'category': "str type expected",
+    'description': "str type expected",
+}
+
+# Numeric dates are Unix timestamps, as pydantic's datetime field accepted
+# them: seconds, or milliseconds when too large to be seconds
+_MS_WATERSHED = 2e10
+# Bound of datetime64[ns], which tops out in 2262
+_MAX_EPOCH_MICROS = np.iinfo(np.int64).max // 1000
+
+
+class TransactionValidationError(ValueError):
+    """Raised when a transaction payload does not match the shared schema"""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+        super().__init__(
+            "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in errors)
+        )
+
+
+class TransactionRow(tuple):
+    """
+    A transaction's ``(date, amount, category, description)``, as left in place
+    of its JSON object by ``parse_json``
+
+    Four-item tuples take a fraction of the memory of the dicts they replace.
+    """
+
+    __slots__ = ()
+
+
+def parse_json(body: Union[bytes, str]) -> Any:
+    """
+    ``json.loads`` that compacts transaction objects while parsing
+
+    Each object with ``date``, ``amount``, ``category`` and ``description`` (or
+    ``merchant``) is turned into a TransactionRow as soon as it has been parsed,
+    so a large request never holds one dict per transaction. Objects missing a
+    field are left as dicts for ``TransactionBatch.from_records`` to report.
+    Raises TransactionValidationError for malformed JSON.
+    """
+    # Categories and descriptions repeat a lot; keep one copy of each string
+    strings: Dict[Any, Any] = {}
+
+    def compact(obj: Dict[str, Any]) -> Any:
+        try:
+            date, amount, category = obj['date'], obj['amount'], obj['category']
+        except KeyError:
+            return obj
+        description = obj.get('description', obj.get('merchant'))
+        if description is None:
+            return obj
+        if type(category) is str:
+            category = strings.setdefault(category, category)
+        if type(description) is str:
+            description = strings.setdefault(description, description)
+        return TransactionRow((date, amount, category, description))
+
+    try:
+        return json.loads(body, object_hook=compact)
+    except ValueError as e:
+        raise TransactionValidationError([
+            {"loc": ["body", getattr(e, 'pos', 0)], "msg": "JSON decode error"}
+        ])
+
+
+class TransactionBatch:
+    """
+    Struct-of-arrays container for a user's transactions
+
+    Every transaction has a ``date``, ``amount``, ``category`` and ``description``.
+    Instead of one object per transaction the batch keeps a datetime64 and a
+    float64 column plus dictionary-encoded category and description columns
+    (int32 codes into arrays of the distinct values), which is a few dozen bytes
+    per transaction regardless of how many there are.
+    """
+
+    __slots__ = (
+        'dates',
+        'amounts',
+        'category_codes',
+        'category_values',
+        'description_codes',
+        'description_values',
+    )
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        amounts: np.ndarray,
+        category_codes: np.ndarray,
+        category_values: np.ndarray,
+        description_codes: np.ndarray,
+        description_values: np.ndarray
+    ):
+        self.dates = dates
+        self.amounts = amounts
+        self.category_codes = category_codes
+        self.category_values = category_values
+        self.description_codes = description_codes
+        self.description_values = description_values
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]],
+                     loc: Loc = ()) -> 'TransactionBatch':
+        """
+        Validate and decode a list of transaction dicts (e.g. a parsed JSON body)
+
+        Fields are pulled out in a single pass without building per-transaction
+        objects, then converted column-wise. ``merchant`` is accepted in place of
+        ``description`` for clients of the older schema. Records may also be
+        ``(date, amount, category, description)`` tuples as produced by
+        ``parse_json``. Raises TransactionValidationError with
+        pydantic-style ``loc``/``msg`` entries.
+        """
+        if not isinstance(records, (list, tuple)):
+            raise TransactionValidationError([
+                {"loc": list(loc), "msg": "value is not a valid list"}
+            ])
+
+        n = len(records)
+        dates: List[Any] = [None] * n
+        amounts: List[Any] = [None] * n
+        categories: List[Any] = [None] * n
+        descriptions: List[Any] = [None] * n
+        errors = []
+
+        for i, record in enumerate(records):
+            if type(record) is TransactionRow:
+                dates[i], amounts[i], categories[i], description = record
+            elif type(record) is not dict:
+                errors.append({"loc": [*loc, i], "msg": "value is not a valid dict"})
+                continue
+            else:
+                try:
+                    dates[i] = record['date']
+                    amounts[i] = record['amount']
+                    categories[i] = record['category']
+                except KeyError as e:
+                    errors.append(
+                        {"loc": [*loc, i, e.args[0]], "msg": "field required"}
+                    )
+                    continue
+                description = record.get('description', record.get('merchant'))
+                if description is None:
+                    errors.append(
+                        {"loc": [*loc, i, 'description'], "msg": "field required"}
+                    )
+            descriptions[i] = description
+            if not (isinstance(dates[i], _SCALAR_TYPES)
+                    and isinstance(amounts[i], _SCALAR_TYPES)
+                    and isinstance(categories[i], _SCALAR_TYPES)
+                    and isinstance(description, _SCALAR_TYPES)):
+                fields = (dates[i], amounts[i], categories[i], description)
+                errors.extend(
+                    {"loc": [*loc, i, field], "msg": _FIELD_ERRORS[field]}
+                    for field, value in zip(_FIELD_ERRORS, fields)
+                    if not isinstance(value, _SCALAR_TYPES)
+                )
+
+        if errors:
+            raise TransactionValidationError(errors)
+
+        return cls(
+            _decode_dates(dates, loc),
+            _decode_amounts(amounts, loc),
+            *_encode_strings(categories, [*loc, 'category']),
+            *_encode_strings(descriptions, [*loc, 'description'])
+        )
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, loc: Loc = ()) -> 'TransactionBatch':
+        """
+        Validate and decode a DataFrame with transaction columns, e.g. one CSV
+        or Parquet chunk
+        """
+        description = 'description' if 'description' in frame.columns else 'merchant'
+        missing = [
+            column for column in ('date', 'amount', 'category', description)
+            if column not in frame.columns
+        ]
+        if missing:
+            raise TransactionValidationError([
+                {"loc": [*loc, column], "msg": "field required"} for column in missing
+            ])
+
+        categories = frame['category'].to_numpy(dtype=object)
+        descriptions = frame[description].to_numpy(dtype=object)
+        return cls(
+            _decode_dates(frame['date'].to_numpy(), loc),
+            _decode_amounts(frame['amount'].to_numpy(), loc),
+            *_encode_strings(categories, [*loc, 'category']),
+            *_encode_strings(descriptions, [*loc, 'description'])
+        )
+
+    @classmethod
+    def coerce(
+        cls, transactions: Union['TransactionBatch', Sequence[Dict[str, Any]]]
+    ) -> 'TransactionBatch':
+        """Return ``transactions`` as a TransactionBatch, decoding lists of dicts"""
+        if isinstance(transactions, cls):
+            return transactions
+        return cls.from_records(transactions)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @property
+    def categories(self) -> np.ndarray:
+        return self.category_values[self.category_codes]
+
+    @property
+    def descriptions(self) -> np.ndarray:
+        return self.description_values[self.description_codes]
+
+    def with_categories(self, category_values: np.ndarray) -> 'TransactionBatch':
+        """
+        Copy of the batch with each distinct category replaced by
+        ``category_values``
+        """
+        codes, values = pd.factorize(category_values)
+        return TransactionBatch(
+            self.dates,
+            self.amounts,
+            codes[self.category_codes].astype(np.int32),
+            np.asarray(values, dtype=object),
+            self.description_codes,
+            self.description_values
+        )
+
+    def slice(self, start: int, end: int) -> 'TransactionBatch':
+        """Transactions ``start:end`` as a view sharing this batch's arrays"""
+        return TransactionBatch(
+            self.dates[start:end],
+            self.amounts[start:end],
+            self.category_codes[start:end],
+            self.category_values,
+            self.description_codes[start:end],
+            self.description_values
+        )
+
+    def time_span_days(self) -> int:
+        """Whole days between the first and last transaction"""
+        if not len(self):
+            return 0
+        return int((self.dates.max() - self.dates.min()) // np.timedelta64(1, 'D'))
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame with one row per transaction and categorical string columns"""
+        return pd.DataFrame({
+            'date': self.dates,
+            'amount': self.amounts,
+            'category': pd.Categorical.from_codes(
+                self.category_codes, self.category_values
+            ),
+            'description': pd.Categorical.from_codes(
+                self.description_codes, self.description_values
+            )
+        })
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Expand back into a list of transaction dicts"""
+        return [
+            {
+                'date': date,
+                'amount': amount,
+                'category': category,
+                'description': description
+            }
+            for date, amount, category, description in zip(
+                pd.DatetimeIndex(self.dates).to_pydatetime(),
+                self.amounts.tolist(),
+                self.categories.tolist(),
+                self.descriptions.tolist()
+            )
+        ]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the batch"""
+        strings = sum(
+            len(s) + 49
+            for values in (self.category_values, self.description_values)
+            for s in values
+        )
+        arrays = (self.dates, self.amounts, self.category_codes, self.description_codes,
+                  self.category_values, self.description_values)
+        return sum(a.nbytes for a in arrays) + strings
+
+
+def transaction_amounts(
+    transactions: Union[TransactionBatch, Iterable[Dict[str, Any]]]
+) -> np.ndarray:
+    """Amount column of a TransactionBatch or a list of transaction dicts"""
+    if isinstance(transactions, TransactionBatch):
+        return transactions.amounts
+    return np.fromiter((t['amount'] for t in transactions), dtype=np.float64)
+
+
+def _decode_dates(values: Sequence[Any], loc: Loc) -> np.ndarray:
+    try:
+        dates = pd.to_datetime(values, format='ISO8601')
+    except (ValueError, TypeError):
+        dates = _decode_mixed_dates(values, loc)
+    if dates.tz is not None:
+        dates = dates.tz_convert('UTC').tz_localize(None)
+    if dates.hasnans:
+        raise TransactionValidationError([
+            {"loc": [*loc, int(i), 'date'], "msg": "none is not an allowed value"}
+            for i in np.flatnonzero(dates.isna())
+        ])
+    return dates.to_numpy(dtype='datetime64[ns]')
+
+
+def _decode_mixed_dates(values: Sequence[Any], loc: Loc) -> pd.DatetimeIndex:
+    """
+    Slow path for Unix timestamps and mixed UTC offsets, normalised to naive
+    UTC
+    """
+    numeric = np.fromiter(
+        (_is_number(value) for value in values), dtype=bool, count=len(values)
+    )
+    try:
+        strings = pd.to_datetime(
+            [v for v, n in zip(values, numeric) if not n], format='ISO8601', utc=True
+        )
+        epochs = _epoch_seconds([v for v, n in zip(values, numeric) if n])
+    except (ValueError, TypeError, OverflowError):
+        raise TransactionValidationError([
+            {"loc": [*loc, i, 'date'], "msg": "invalid datetime format"}
+            for i in _invalid_indices(values, _require_datetime)
+        ])
+    dates = np.empty(len(values), dtype='datetime64[ns]')
+    dates[~numeric] = strings.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+    dates[numeric] = epochs
+    return pd.DatetimeIndex(dates)
+
+
+def _epoch_seconds(values: Sequence[Any]) -> np.ndarray:
+    seconds = np.array(values, dtype=np.float64)
+    seconds = np.where(np.abs(seconds) > _MS_WATERSHED, seconds / 1000, seconds)
+    # Rounded to whole microseconds, so 1700000000.123 doesn't become ...122999907
+    micros = np.round(seconds * 1e6)
+    if not (np.abs(micros) < _MAX_EPOCH_MICROS).all():
+        raise ValueError("invalid datetime format")
+    return micros.astype(np.int64).astype('datetime64[us]').astype('datetime64[ns]')
+
+
+def _decode_amounts(values: Sequence[Any], loc: Loc) -> np.ndarray:
+    try:
+        amounts = np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        amounts = None
+    # Equal-length lists convert "successfully" into a 2-D array
+    if amounts is None or amounts.ndim != 1:
+        raise TransactionValidationError([
+            {"loc": [*loc, i, 'amount'], "msg": "value is not a valid float"}
+            for i in _invalid_indices(values, _require_float)
+        ])
+    # NaN, Infinity and out-of-range literals such as 1e999 all decode to
+    # non-finite floats that would poison every sum they reach
+    invalid = np.flatnonzero(~np.isfinite(amounts))
+    if len(invalid):
+        raise TransactionValidationError([
+            {"loc": [*loc, int(i), 'amount'],
+             "msg": ("value is not a valid float" if np.isnan(amounts[i])
+                     else "ensure this value is a finite number")}
+            for i in invalid
+        ])
+    return amounts
+
+
+def _encode_strings(values: Sequence[Any], loc: Loc) -> tuple:
+    """Dictionary-encode a string column, validating only its distinct values"""
+    try:
+        # fromiter keeps the column 1-D even if the values are sequences
+        column = np.fromiter(values, dtype=object, count=len(values))
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    except (TypeError, ValueError):
+        # Unhashable values (dicts, lists) that slipped past the record checks
+        field = loc[-1]
+        raise TransactionValidationError([
+            {"loc": [*loc[:-1], i, field], "msg": "str type expected"}
+            for i in _invalid_indices(values, _require_str)
+        ])
+    if (codes < 0).any():
+        field = loc[-1]
+        raise TransactionValidationError([
+            {"loc": [*loc[:-1], int(i), field], "msg": "none is not an allowed value"}
+            for i in np.flatnonzero(codes < 0)
+        ])
+
+    uniques = np.asarray(uniques, dtype=object)
+    if not all(type(u) is str for u in uniques):
+        strings = []
+        for u in uniques:
+            if isinstance(u, (int, float)) and not isinstance(u, bool):
+                u = str(u)
+            if not isinstance(u, str):
+                field = loc[-1]
+                raise TransactionValidationError([
+                    {"loc": [*loc[:-1], int(i), field], "msg": "str type expected"}
+                    for i in _invalid_indices(values, _require_str)
+                ])
+            strings.append(u)
+        # Coercion can make distinct values equal (1 and "1"), so factorize again
+        recoded, uniques = pd.factorize(np.array(strings, dtype=object)[codes])
+        codes, uniques = recoded, np.asarray(uniques, dtype=object)
+
+    return codes.astype(np.int32), uniques
+
+
+def _require_str(value: Any) -> None:
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise TypeError("str type expected")
+
+
+def _require_float(value: Any) -> None:
+    if not isinstance(value, _SCALAR_TYPES):
+        raise TypeError("value is not a valid float")
+    np.float64(value)
+
+
+def _require_datetime(value: Any) -> None:
+    if not isinstance(value, _SCALAR_TYPES):
+        raise TypeError("invalid datetime format")
+    if _is_number(value):
+        _epoch_seconds([value])
+    else:
+        pd.to_datetime(value, format='ISO8601')
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def _invalid_indices(values: Sequence[Any], check: Any) -> List[int]:
+    """
+    Indices of the values ``check`` rejects; only used to report errors
+
+    Never empty: if every value passes on its own, the column only fails as a
+    whole and all of its indices are reported.
+    """
+    invalid = []
+    for i, value in enumerate(values):
+        try:
+            check(value)
+        except (ValueError, TypeError):
+            invalid.append(i)
+    return invalid or list(range(len(values)))
@@ -3,5 +3,6 @@ Financial Advisor Services Package
 """
 
 from .analysis_service import AnalysisService
+from .batch_scheduler import BatchScheduler
 
- 
\ No newline at end of file
+__all__ = ["AnalysisService", "BatchScheduler"]
\ No newline at end of file
@@ -1 +1,42 @@
- 
\ No newline at end of file
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from ..models.financial_advisor import FinancialAdvisor, Transactions
+from .batch_scheduler import DEFAULT_MAX_BATCH_SIZE, DEFAULT_WINDOW_MS, BatchScheduler
+
+logger = logging.getLogger(__name__)
+
+AnalysisItem = Tuple[Transactions, Dict[str, Any]]
+
+
+class AnalysisService:
+    """
+    Async front for the FinancialAdvisor
+
+    Concurrent analysis calls are coalesced by a BatchScheduler and computed with
+    ``FinancialAdvisor.analyze_batch``, so each caller still gets exactly the
+    result ``analyze_transactions`` would have returned for its own request.
+    """
+
+    def __init__(
+        self,
+        advisor: Optional[FinancialAdvisor] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        window_ms: float = DEFAULT_WINDOW_MS,
+    ):
+        self.advisor = advisor or FinancialAdvisor()
+        self.scheduler: BatchScheduler[AnalysisItem, Dict[str, Any]] = BatchScheduler(
+            self.advisor.analyze_batch,
+            max_batch_size=max_batch_size,
+            window_ms=window_ms,
+        )
+
+    async def analyze_transactions(
+        self, transactions: Transactions, user_profile: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Analyze one user's transactions as part of the next micro-batch"""
+        return await self.scheduler.submit((transactions, user_profile or {}))
+
+    def batching_stats(self) -> Dict[str, Any]:
+        """Batch fill metrics of the underlying scheduler"""
+        return self.scheduler.stats()
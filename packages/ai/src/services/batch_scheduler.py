@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_WINDOW_MS = 5.0
+
+
+class BatchScheduler(Generic[T, R]):
+    """
+    Coalesce concurrent calls into micro-batches
+
+    Items submitted within ``window_ms`` of the first pending item (or until
+    ``max_batch_size`` items are waiting) are handed to ``process_batch`` as one
+    list. The batch function runs in ``executor`` so the event loop keeps
+    accepting requests while a batch is being computed, and each result is
+    fanned back out to the coroutine that submitted the matching item.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[T]], List[R]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        executor: Optional[Executor] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if window_ms < 0:
+            raise ValueError("window_ms must not be negative")
+
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.window_ms = window_ms
+        self.executor = executor
+
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+        # Batch fill metrics
+        self._batches = 0
+        self._items = 0
+        self._full_flushes = 0
+        self._fallbacks = 0
+        self._size_histogram: Dict[int, int] = {}
+
+    async def submit(self, item: T) -> R:
+        """Queue an item for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._full_flushes += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch fill metrics since the scheduler was created"""
+        mean_size = self._items / self._batches if self._batches else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window_ms,
+            "batches": self._batches,
+            "requests": self._items,
+            "mean_batch_size": mean_size,
+            "mean_fill_ratio": mean_size / self.max_batch_size,
+            "full_batches": self._full_flushes,
+            "fallbacks": self._fallbacks,
+            "pending": len(self._pending),
+            "in_flight_batches": len(self._running),
+            "batch_size_histogram": dict(sorted(self._size_histogram.items())),
+        }
+
+    def _flush(self) -> None:
+        """Hand every pending item to a new batch task"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self._batches += 1
+        self._items += len(batch)
+        self._size_histogram[len(batch)] = self._size_histogram.get(len(batch), 0) + 1
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        """Compute a batch and resolve the futures waiting on it"""
+        loop = asyncio.get_running_loop()
+        items = [item for item, _ in batch]
+
+        try:
+            results = await loop.run_in_executor(
+                self.executor, self.process_batch, items
+            )
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results "
+                    f"for {len(items)} items"
+                )
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][1], exception=e)
+                return
+
+            # One bad request must not fail everyone it was batched with, so
+            # retry the items one by one and let only the culprit see the error
+            logger.warning(
+                f"Batch of {len(batch)} failed ({str(e)}), "
+                "retrying items individually"
+            )
+            self._fallbacks += 1
+            for item, future in batch:
+                try:
+                    result = await loop.run_in_executor(
+                        self.executor, self.process_batch, [item]
+                    )
+                    self._resolve(future, result=result[0])
+                except Exception as item_error:
+                    self._resolve(future, exception=item_error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            self._resolve(future, result=result)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any = None,
+                 exception: Optional[BaseException] = None) -> None:
+        """Complete a future unless its caller has already gone away"""
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
@@ -0,0 +1,26 @@
+"""
+Financial Advisor Training
+
+This package contains the feature extraction and training pipeline for the
+Financial Advisor models.
+"""
+
+from .features import (
+    FEATURE_NAMES,
+    FeatureCache,
+    decode_user_lines,
+    extract_features,
+    load_users,
+)
+from .trainer import MODEL_NAMES, ModelTrainer, TrainingReport
+
+__all__ = [
+    "FEATURE_NAMES",
+    "FeatureCache",
+    "MODEL_NAMES",
+    "ModelTrainer",
+    "TrainingReport",
+    "decode_user_lines",
+    "extract_features",
+    "load_users",
+]
\ No newline at end of file
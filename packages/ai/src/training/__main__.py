@@ -0,0 +1,76 @@
+"""
+Nightly training entry point
+
+    python -m src.training users.jsonl --n-jobs 8
+
+Each line of the input holds one user::
+
+    {"transactions": [...], "user_profile": {...},
+     "targets": {"risk_assessor": "low", ...}}
+
+A model is trained when every user has a target for it; ``savings_predictor``
+is always trained, on the cash-flow forecaster's residuals. Lines are decoded
+into features on ``--n-jobs`` processes, ``--chunk-size`` lines per task.
+"""
+
+import argparse
+import json
+import logging
+import os
+
+from ..models.financial_advisor import FinancialAdvisor
+from .trainer import MODEL_NAMES, ModelTrainer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the Financial Advisor models")
+    parser.add_argument(
+        "users",
+        help="JSON lines file with transactions, user_profile and targets per user"
+    )
+    parser.add_argument(
+        "--model-path",
+        default=os.getenv('MODEL_PATH', './models/financial_advisor')
+    )
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Input lines per decoding task")
+    parser.add_argument("--warm-start-estimators", type=int, default=20,
+                        help="Trees/stages to add to already fitted models "
+                             "(0 refits from scratch)")
+    parser.add_argument("--max-estimators", type=int, default=400,
+                        help="Refit a model from scratch instead of growing it "
+                             "past this many trees/stages")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    trainer = ModelTrainer(
+        FinancialAdvisor(args.model_path),
+        n_jobs=args.n_jobs,
+        chunk_size=args.chunk_size,
+        warm_start_estimators=args.warm_start_estimators,
+        max_estimators=args.max_estimators
+    )
+    features, users, targets = trainer.load_users(args.users)
+    complete_targets = {
+        name: values for name, values in targets.items()
+        if name in MODEL_NAMES and all(value is not None for value in values)
+    }
+
+    report = trainer.train(users, complete_targets, features=features)
+
+    print(json.dumps({
+        "users": report.n_users,
+        "trained": report.trained,
+        "warm_started": report.warm_started,
+        "skipped": report.skipped,
+        "feature_cache_hit": report.feature_cache_hit,
+        "timings": {
+            stage: round(seconds, 3) for stage, seconds in report.timings.items()
+        }
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
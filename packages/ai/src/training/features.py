@@ -0,0 +1,218 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..models.forecasting import CashFlowForecaster
+from ..schemas.transactions import TransactionBatch, TransactionValidationError
+from ..utils.segments import segment_ids, segment_masked_stats
+
+logger = logging.getLogger(__name__)
+
+UserRecord = Tuple[Union[TransactionBatch, List[Dict[str, Any]]], Dict[str, Any]]
+# Feature rows, users (monthly totals and profile) and targets per model
+LoadedUsers = Tuple[np.ndarray, List[UserRecord], Dict[str, List[Any]]]
+
+# Bump when the feature definitions change so cached matrices are not reused
+FEATURE_VERSION = 1
+
+PROFILE_FEATURES = [
+    'age',
+    'annual_income',
+    'super_balance',
+    'emergency_fund',
+    'investment_assets',
+    'super_contributions',
+    'work_expenses',
+    'investment_diversity',
+]
+
+TRANSACTION_FEATURES = [
+    'transaction_count',
+    'total_income',
+    'total_expenses',
+    'savings_rate',
+    'income_volatility',
+    'expense_volatility',
+    'mean_income',
+    'mean_expense',
+    'data_time_span_months',
+]
+
+FEATURE_NAMES = TRANSACTION_FEATURES + PROFILE_FEATURES
+
+
+def extract_features(users: Sequence[UserRecord]) -> np.ndarray:
+    """
+    Feature matrix with one row per (transactions, user_profile) pair
+
+    Transaction aggregates are computed for all users at once on a segmented
+    amount array, the same way FinancialAdvisor.analyze_batch does. Missing
+    profile fields become 0.
+    """
+    batches = [TransactionBatch.coerce(transactions) for transactions, _ in users]
+    n = len(batches)
+    features = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float64)
+    if not n:
+        return features
+
+    lengths = [len(batch) for batch in batches]
+    amounts = np.concatenate([batch.amounts for batch in batches])
+    ids = segment_ids(lengths)
+
+    income_count, income, income_volatility = segment_masked_stats(
+        amounts, amounts > 0, ids, n
+    )
+    expense_count, expenses, expense_volatility = segment_masked_stats(
+        -amounts, amounts < 0, ids, n
+    )
+
+    features[:, 0] = lengths
+    features[:, 1] = income
+    features[:, 2] = expenses
+    features[:, 3] = _safe_divide(income - expenses, income)
+    features[:, 4] = income_volatility
+    features[:, 5] = expense_volatility
+    features[:, 6] = _safe_divide(income, income_count)
+    features[:, 7] = _safe_divide(expenses, expense_count)
+    features[:, 8] = [batch.time_span_days() / 30 for batch in batches]
+
+    offset = len(TRANSACTION_FEATURES)
+    for i, (_, user_profile) in enumerate(users):
+        for j, name in enumerate(PROFILE_FEATURES):
+            value = user_profile.get(name)
+            if value is not None:
+                features[i, offset + j] = value
+
+    return features
+
+
+def decode_user_lines(lines: Sequence[bytes], first_line: int = 0) -> LoadedUsers:
+    """
+    Decode JSON lines of ``{"transactions", "user_profile", "targets"}`` records
+
+    Returns the users' feature rows, each user's history reduced to monthly
+    totals (all the residual model's training set needs) with their profile,
+    and the targets per model, None where a user has none. Validation errors
+    are located by line number, counting from ``first_line``.
+    """
+    records = [json.loads(line) for line in lines]
+    targets: Dict[str, List[Any]] = {}
+    for i, record in enumerate(records):
+        for name, value in record.get('targets', {}).items():
+            targets.setdefault(name, [None] * len(lines))[i] = value
+
+    # One decode for the whole chunk, then a view per user; pandas' per-call
+    # overhead would otherwise dominate for short histories
+    lengths = [len(record['transactions']) for record in records]
+    try:
+        batch = TransactionBatch.from_records(
+            [t for record in records for t in record['transactions']]
+        )
+    except TransactionValidationError:
+        for i, record in enumerate(records):
+            TransactionBatch.from_records(
+                record['transactions'], loc=(first_line + i, 'transactions')
+            )
+        raise
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    users = [(batch.slice(start, end), record['user_profile'])
+             for start, end, record in zip(bounds[:-1], bounds[1:], records)]
+
+    monthly = [
+        (CashFlowForecaster.monthly_totals(transactions), profile)
+        for transactions, profile in users
+    ]
+    return extract_features(users), monthly, targets
+
+
+def load_users(path: str, chunk_size: int = 1000, n_jobs: int = 1) -> LoadedUsers:
+    """
+    ``decode_user_lines`` over a JSON lines file, ``chunk_size`` lines per task
+    on a pool of ``n_jobs`` processes
+
+    Workers get raw lines and send back only feature rows and monthly totals,
+    so the expensive JSON decoding is what runs in parallel.
+    """
+    with open(path, 'rb') as f:
+        lines = [line for line in f if line.strip()]
+    starts = range(0, len(lines), chunk_size)
+    chunks = [lines[i:i + chunk_size] for i in starts]
+    del lines
+
+    if n_jobs == 1 or len(chunks) <= 1:
+        parts = [
+            decode_user_lines(chunk, start) for chunk, start in zip(chunks, starts)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            parts = list(executor.map(decode_user_lines, chunks, starts))
+
+    if parts:
+        features = np.vstack([part[0] for part in parts])
+    else:
+        features = np.zeros((0, len(FEATURE_NAMES)))
+    users = [user for part in parts for user in part[1]]
+    targets: Dict[str, List[Any]] = {}
+    offset = 0
+    for (_, _, chunk_targets), chunk in zip(parts, chunks):
+        for name, values in chunk_targets.items():
+            column = targets.setdefault(name, [None] * len(users))
+            column[offset:offset + len(chunk)] = values
+        offset += len(chunk)
+    return features, users, targets
+
+
+class FeatureCache:
+    """
+    On-disk cache of feature matrices as ``.npy`` files
+
+    Cached matrices are opened with ``mmap_mode='r'``, so re-running training on
+    the same snapshot pages features in from disk instead of re-extracting them
+    or holding a second copy in memory.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def path(self, key: str) -> str:
+        digest = hashlib.sha256(f"v{FEATURE_VERSION}:{key}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"features-{digest}.npy")
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        """Memory-mapped cached matrix for ``key``, or None"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable feature cache {path}: {str(e)}")
+            return None
+
+    def store(self, key: str, features: np.ndarray) -> np.ndarray:
+        """Write ``features`` for ``key`` and return the memory-mapped copy"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        # Write next to the final file and rename so readers never see a partial
+        # matrix
+        matrix = np.lib.format.open_memmap(
+            tmp_path, mode='w+', dtype=features.dtype, shape=features.shape
+        )
+        matrix[:] = features
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, path)
+
+        return np.load(path, mmap_mode='r')
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(numerator))
+    return np.divide(numerator, denominator, out=out, where=denominator > 0)
\ No newline at end of file
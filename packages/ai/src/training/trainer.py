@@ -0,0 +1,209 @@
+import copy
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator
+from sklearn.ensemble import RandomForestClassifier
+
+from ..models.financial_advisor import FinancialAdvisor, default_models
+from ..models.registry import MODEL_NAMES
+from .features import (
+    FeatureCache,
+    LoadedUsers,
+    UserRecord,
+    extract_features,
+    load_users,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrainingReport:
+    n_users: int = 0
+    feature_cache_hit: bool = False
+    trained: List[str] = field(default_factory=list)
+    warm_started: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage into ``timings``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+            logger.info(f"Training stage {name} took {self.timings[name]:.2f}s")
+
+
+class ModelTrainer:
+    """
+    Train the FinancialAdvisor's models from per-user histories
+
+    Users are decoded from JSON lines and turned into features in parallel
+    chunks on a process pool (``load_users``); features of in-memory users can
+    be cached on disk under ``cache_dir``. The four models are then fitted
+    concurrently. ``savings_predictor`` is the forecaster's residual model, so
+    it is fitted on backtest residuals of the users' monthly cash flow rather
+    than on a target. Models that are already fitted are grown with ``warm_start``
+    by ``warm_start_estimators`` trees/stages on the new data instead of being
+    rebuilt from scratch (pass 0 to always refit). Once that would take a
+    model past ``max_estimators`` it is refit from scratch at its default
+    size, so repeated retraining doesn't grow the models (and prediction
+    latency) without bound. Warm-started classifiers must see the same set of
+    classes as in their original fit.
+    """
+
+    def __init__(
+        self,
+        advisor: FinancialAdvisor,
+        n_jobs: int = 1,
+        chunk_size: int = 1000,
+        cache_dir: Optional[str] = None,
+        warm_start_estimators: int = 20,
+        max_estimators: int = 400
+    ):
+        self.advisor = advisor
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.cache = FeatureCache(cache_dir) if cache_dir else None
+        self.warm_start_estimators = warm_start_estimators
+        self.max_estimators = max_estimators
+
+    def build_features(self, users: Sequence[UserRecord],
+                       cache_key: Optional[str] = None,
+                       report: Optional[TrainingReport] = None) -> np.ndarray:
+        """
+        Feature matrix for ``users``, read from the cache when ``cache_key``
+        was seen before
+        """
+        report = report or TrainingReport()
+        if self.cache is not None and cache_key is not None:
+            cached = self.cache.load(cache_key)
+            if cached is not None and len(cached) == len(users):
+                report.feature_cache_hit = True
+                return cached
+
+        with report.stage('extract_features'):
+            features = extract_features(users)
+
+        if self.cache is not None and cache_key is not None:
+            with report.stage('cache_features'):
+                features = self.cache.store(cache_key, features)
+        return features
+
+    def load_users(self, path: str) -> LoadedUsers:
+        """
+        Features, users (histories reduced to monthly totals) and per-model
+        targets from a JSON lines file, decoded on ``n_jobs`` processes
+        """
+        started = time.perf_counter()
+        result = load_users(path, chunk_size=self.chunk_size, n_jobs=self.n_jobs)
+        seconds = time.perf_counter() - started
+        logger.info(f"Loaded {len(result[1])} users in {seconds:.2f}s")
+        return result
+
+    def train(
+        self,
+        users: Sequence[UserRecord],
+        targets: Mapping[str, Any],
+        cache_key: Optional[str] = None,
+        save: bool = True,
+        features: Optional[np.ndarray] = None
+    ) -> TrainingReport:
+        """
+        Fit ``savings_predictor`` plus every other model that has an entry in
+        ``targets`` (one label per user) and install the fitted models on the advisor
+
+        ``features`` are used as given when already extracted (by ``load_users``).
+        """
+        report = TrainingReport(n_users=len(users))
+
+        with report.stage('total'):
+            if features is None:
+                features = self.build_features(users, cache_key, report)
+
+            with report.stage('residual_features'):
+                forecaster = self.advisor.forecaster
+                residual_features, residuals = forecaster.residual_training_set(
+                    [transactions for transactions, _ in users]
+                )
+
+            jobs = []
+            for name in MODEL_NAMES:
+                if name == 'savings_predictor':
+                    X, y = residual_features, residuals
+                elif name in targets:
+                    X, y = features, np.asarray(targets[name])
+                    if len(y) != len(features):
+                        raise ValueError(
+                            f"{name} has {len(y)} targets for {len(features)} users"
+                        )
+                else:
+                    report.skipped.append(name)
+                    continue
+                if not len(y):
+                    report.skipped.append(name)
+                    continue
+                model = self._prepare(getattr(self.advisor, name), name, report)
+                jobs.append((name, model, X, y))
+
+            n_jobs = min(len(jobs), self.n_jobs) or 1
+            results = Parallel(n_jobs=n_jobs, prefer='threads')(
+                delayed(self._fit)(name, model, X, y) for name, model, X, y in jobs
+            )
+            fitted = {}
+            for name, model, seconds in results:
+                fitted[name] = model
+                report.trained.append(name)
+                report.timings[f"fit_{name}"] = seconds
+            if fitted:
+                models = replace(self.advisor.models, version=None, **fitted)
+                self.advisor.install_models(models)
+
+            if save and report.trained:
+                with report.stage('save_models'):
+                    self.advisor.save_models()
+
+        return report
+
+    def _prepare(self, model: BaseEstimator, name: str,
+                 report: TrainingReport) -> BaseEstimator:
+        """
+        Copy of the advisor's model switched to warm start if it is fitted, or
+        reset for a full fit; the live model keeps serving until the swap
+        """
+        model = copy.deepcopy(model)
+        if isinstance(model, RandomForestClassifier):
+            model.set_params(n_jobs=self.n_jobs)
+
+        fitted = hasattr(model, 'estimators_')
+        grown = model.n_estimators + self.warm_start_estimators
+        if fitted and self.warm_start_estimators > 0 and grown <= self.max_estimators:
+            model.set_params(warm_start=True, n_estimators=grown)
+            report.warm_started.append(name)
+        else:
+            n_estimators = model.n_estimators
+            if fitted:
+                # Back to the default size after warm starts reached the cap
+                n_estimators = getattr(default_models(), name).n_estimators
+            model.set_params(warm_start=False, n_estimators=n_estimators)
+        return model
+
+    @staticmethod
+    def _fit(name: str, model: BaseEstimator, features: np.ndarray,
+             y: np.ndarray) -> tuple:
+        started = time.perf_counter()
+        model.fit(features, y)
+        seconds = time.perf_counter() - started
+        logger.info(
+            f"Fitted {name} ({model.n_estimators} estimators) in {seconds:.2f}s"
+        )
+        return name, model, seconds
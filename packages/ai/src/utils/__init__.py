@@ -3,5 +3,6 @@ Financial Advisor Utilities Package
 """
 
 from .data_processor import DataProcessor
+from .chunked_analytics import ChunkedAnalyzer, PartialAggregate
 
-__all__ = ['DataProcessor'] 
\ No newline at end of file
+__all__ = ['DataProcessor', 'ChunkedAnalyzer', 'PartialAggregate'] 
\ No newline at end of file
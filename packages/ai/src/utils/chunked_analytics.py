@@ -0,0 +1,358 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+from ..schemas.transactions import TransactionBatch
+from .data_processor import DataProcessor
+
+logger = logging.getLogger(__name__)
+
+# Rough peak cost of one transaction row while its chunk is parsed by pandas,
+# decoded into a TransactionBatch and aggregated (object strings included)
+ESTIMATED_ROW_BYTES = 512
+
+Chunk = Union[TransactionBatch, pd.DataFrame, List[Dict[str, Any]]]
+# A path to a CSV/Parquet file, or a callable that yields chunks of at most
+# the given number of rows (e.g. a database cursor's fetchmany loop)
+HistorySource = Union[str, os.PathLike, Callable[[int], Iterable[Chunk]]]
+
+
+@dataclass
+class Moments:
+    """
+    Count, sum and sum of squared deviations of a set of values, mergeable
+    across chunks
+    """
+
+    count: int = 0
+    total: float = 0.0
+    m2: float = 0.0
+
+    @classmethod
+    def of(cls, values: np.ndarray) -> 'Moments':
+        if not len(values):
+            return cls()
+        total = float(values.sum())
+        m2 = float(((values - total / len(values)) ** 2).sum())
+        return cls(len(values), total, m2)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float('nan')
+
+    def std(self, ddof: int = 0) -> float:
+        if self.count - ddof <= 0:
+            return float('nan')
+        return float(np.sqrt(self.m2 / (self.count - ddof)))
+
+    def merge(self, other: 'Moments') -> 'Moments':
+        """Combine with another chunk's moments (Chan et al.'s pairwise update)"""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.total, self.m2 = other.count, other.total, other.m2
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        return self
+
+
+@dataclass
+class PartialAggregate:
+    """
+    Everything the history-wide analytics need from a set of transactions
+
+    Aggregates of separate chunks merge into the aggregate of their union, so
+    a history of any length is reduced one chunk at a time. Daily, monthly and
+    category totals are kept per key (days since the epoch, months since the
+    epoch, category), which grows with the span of the history, not with the
+    number of transactions.
+    """
+
+    amounts: Moments = field(default_factory=Moments)
+    income: Moments = field(default_factory=Moments)
+    expenses: Moments = field(default_factory=Moments)
+    daily: Dict[int, float] = field(default_factory=dict)
+    monthly: Dict[int, float] = field(default_factory=dict)
+    categories: Dict[str, float] = field(default_factory=dict)
+    first_date: Optional[np.datetime64] = None
+    last_date: Optional[np.datetime64] = None
+
+    @classmethod
+    def from_batch(cls, batch: TransactionBatch) -> 'PartialAggregate':
+        amounts = batch.amounts
+        if not len(amounts):
+            return cls()
+
+        days = batch.dates.astype('datetime64[D]').astype(np.int64)
+        day_keys, day_index = np.unique(days, return_inverse=True)
+        day_sums = np.bincount(day_index, weights=amounts)
+
+        months = batch.dates.astype('datetime64[M]').astype(np.int64)
+        month_keys, month_index = np.unique(months, return_inverse=True)
+        month_sums = np.bincount(month_index, weights=amounts)
+
+        n_categories = len(batch.category_values)
+        category_counts = np.bincount(batch.category_codes, minlength=n_categories)
+        category_sums = np.bincount(
+            batch.category_codes, weights=amounts, minlength=n_categories
+        )
+
+        return cls(
+            amounts=Moments.of(amounts),
+            income=Moments.of(amounts[amounts > 0]),
+            expenses=Moments.of(-amounts[amounts < 0]),
+            daily=dict(zip(day_keys.tolist(), day_sums.tolist())),
+            monthly=dict(zip(month_keys.tolist(), month_sums.tolist())),
+            categories={
+                category: total
+                for category, total, count in zip(
+                    batch.category_values, category_sums.tolist(), category_counts
+                )
+                if count
+            },
+            first_date=batch.dates.min(),
+            last_date=batch.dates.max()
+        )
+
+    def merge(self, other: 'PartialAggregate') -> 'PartialAggregate':
+        """Fold ``other`` into this aggregate in place and return it"""
+        self.amounts.merge(other.amounts)
+        self.income.merge(other.income)
+        self.expenses.merge(other.expenses)
+        for totals, other_totals in ((self.daily, other.daily),
+                                     (self.monthly, other.monthly),
+                                     (self.categories, other.categories)):
+            for key, value in other_totals.items():
+                totals[key] = totals.get(key, 0.0) + value
+        if other.first_date is not None:
+            if self.first_date is None:
+                self.first_date, self.last_date = other.first_date, other.last_date
+            else:
+                self.first_date = min(self.first_date, other.first_date)
+                self.last_date = max(self.last_date, other.last_date)
+        return self
+
+    @property
+    def transaction_count(self) -> int:
+        return self.amounts.count
+
+    @property
+    def savings_rate(self) -> float:
+        if self.income.total == 0:
+            return 0.0
+        return (self.income.total - self.expenses.total) / self.income.total
+
+    def time_span_days(self) -> int:
+        if self.first_date is None:
+            return 0
+        return int((self.last_date - self.first_date) // np.timedelta64(1, 'D'))
+
+    def spending_patterns(self) -> Dict[str, Any]:
+        """
+        Same result as ``DataProcessor.calculate_spending_patterns`` on the
+        whole history
+        """
+        days = sorted(self.daily)
+        daily = np.array([self.daily[day] for day in days])
+        return {
+            'daily_spending': {
+                str(np.datetime64(day, 'D')): self.daily[day] for day in days
+            },
+            # Categories stay in order of first appearance, like the categorical
+            # groupby
+            'category_spending': dict(self.categories),
+            'monthly_trends': {
+                str(np.datetime64(month, 'M')): self.monthly[month]
+                for month in sorted(self.monthly)
+            },
+            'total_spent': self.amounts.total,
+            'average_daily_spend': float(daily.mean()) if len(daily) else float('nan'),
+            'spending_volatility': (
+                float(daily.std(ddof=1)) if len(daily) > 1 else float('nan')
+            )
+        }
+
+
+class ChunkedAnalyzer:
+    """
+    Out-of-core analytics over transaction histories too long to load at once
+
+    The history is read ``chunk_rows`` transactions at a time and every chunk
+    is reduced to a PartialAggregate, so peak memory is set by the chunk size
+    rather than by the length of the history. With ``memory_budget_bytes`` the
+    chunk size is derived from the budget and the number of chunks that can be
+    in flight. With ``n_workers > 1`` chunks are decoded and aggregated on a
+    process pool; the parent only reads them and keeps at most two chunks per
+    worker queued. Anomaly detection needs the history-wide mean and standard
+    deviation, so it makes a second pass over the source.
+    """
+
+    def __init__(
+        self,
+        chunk_rows: Optional[int] = None,
+        memory_budget_bytes: Optional[int] = None,
+        n_workers: int = 1,
+        normalize_categories: bool = False
+    ):
+        self.n_workers = max(1, n_workers)
+        self.max_in_flight = 2 * self.n_workers if self.n_workers > 1 else 1
+        if chunk_rows is None:
+            budget = memory_budget_bytes or 256 * 1024 * 1024
+            # Chunks in flight plus the one being read
+            chunk_rows = budget // (ESTIMATED_ROW_BYTES * (self.max_in_flight + 1))
+        if chunk_rows < 1:
+            raise ValueError(
+                "Memory budget is too small for a single transaction per chunk"
+            )
+        self.chunk_rows = int(chunk_rows)
+        self.normalize_categories = normalize_categories
+
+    def aggregate(self, source: HistorySource) -> PartialAggregate:
+        """Reduce the whole history to one PartialAggregate"""
+        result = PartialAggregate()
+        chunks = 0
+        for partial in self._map(source, _aggregate_chunk, self.normalize_categories):
+            result.merge(partial)
+            chunks += 1
+        logger.info(
+            f"Aggregated {result.transaction_count} transactions in {chunks} chunks "
+            f"of up to {self.chunk_rows}"
+        )
+        return result
+
+    def detect_anomalies(self, source: HistorySource, aggregate: PartialAggregate,
+                         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Transactions more than three standard deviations from the history's
+        mean amount, as found by ``DataProcessor.detect_anomalies``
+        """
+        mean, std = aggregate.amounts.mean, aggregate.amounts.std(ddof=1)
+        anomalies: List[Dict[str, Any]] = []
+        records_per_chunk = self._map(
+            source, _chunk_anomalies, self.normalize_categories, mean, std
+        )
+        for records in records_per_chunk:
+            anomalies.extend(records)
+            if limit is not None and len(anomalies) >= limit:
+                return anomalies[:limit]
+        return anomalies
+
+    def analyze(self, source: HistorySource,
+                anomaly_limit: Optional[int] = None) -> Dict[str, Any]:
+        """Spending patterns, savings rate and anomalies of the whole history"""
+        aggregate = self.aggregate(source)
+        return {
+            'spending_patterns': aggregate.spending_patterns(),
+            'savings_rate': aggregate.savings_rate,
+            'anomalies': self.detect_anomalies(source, aggregate, anomaly_limit),
+            'transaction_count': aggregate.transaction_count
+        }
+
+    def iter_chunks(self, source: HistorySource) -> Iterator[Chunk]:
+        """Read ``source`` in chunks of at most ``chunk_rows`` transactions"""
+        if callable(source):
+            yield from source(self.chunk_rows)
+            return
+
+        path = os.fspath(source)
+        if path.endswith(('.parquet', '.pq')):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError(
+                    "Reading Parquet histories requires pyarrow (pip install pyarrow)"
+                )
+            parquet = pq.ParquetFile(path)
+            for record_batch in parquet.iter_batches(batch_size=self.chunk_rows):
+                yield record_batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, chunksize=self.chunk_rows)
+
+    def _map(self, source: HistorySource, function: Callable[..., Any],
+             *args: Any) -> Iterator[Any]:
+        """``function(chunk, *args)`` for every chunk, in order"""
+        if self.n_workers == 1:
+            for chunk in self.iter_chunks(source):
+                yield function(chunk, *args)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+            yield from _bounded_map(
+                pool, self.max_in_flight, function, self.iter_chunks(source), args
+            )
+
+
+def analyzer_options_from_env() -> Dict[str, Any]:
+    """ChunkedAnalyzer options from the ANALYTICS_* settings"""
+    return {
+        "memory_budget_bytes": int(
+            float(os.getenv('ANALYTICS_MEMORY_BUDGET_MB', '256')) * 1024 * 1024
+        ),
+        "n_workers": int(os.getenv('ANALYTICS_WORKERS', '1')),
+    }
+
+
+def _bounded_map(executor: Executor, max_in_flight: int, function: Callable[..., Any],
+                 chunks: Iterable[Chunk], args: tuple) -> Iterator[Any]:
+    # Reading stops while max_in_flight chunks are waiting, so a slow pool
+    # can't make the parent buffer the rest of the file
+    pending: Deque[Any] = deque()
+    try:
+        for chunk in chunks:
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(function, chunk, *args))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _to_batch(chunk: Chunk, normalize_categories: bool) -> TransactionBatch:
+    if isinstance(chunk, pd.DataFrame):
+        batch = TransactionBatch.from_frame(chunk)
+    else:
+        batch = TransactionBatch.coerce(chunk)
+    if normalize_categories:
+        batch = DataProcessor.normalize_categories(batch)
+    return batch
+
+
+def _aggregate_chunk(chunk: Chunk, normalize_categories: bool) -> PartialAggregate:
+    return PartialAggregate.from_batch(_to_batch(chunk, normalize_categories))
+
+
+def _chunk_anomalies(chunk: Chunk, normalize_categories: bool, mean: float,
+                     std: float) -> List[Dict[str, Any]]:
+    batch = _to_batch(chunk, normalize_categories)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_scores = (batch.amounts - mean) / std
+    flagged = np.abs(z_scores) > 3
+    if not flagged.any():
+        return []
+    frame = batch.to_frame()[flagged]
+    frame['z_score'] = z_scores[flagged]
+    frame['category'] = frame['category'].astype(object)
+    frame['description'] = frame['description'].astype(object)
+    return frame.to_dict('records')
\ No newline at end of file
@@ -1,92 +1,118 @@
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 import numpy as np
 from datetime import datetime, timedelta
 
+from ..schemas.transactions import TransactionBatch
+
+Transactions = Union[TransactionBatch, List[Dict[str, Any]]]
+
 class DataProcessor:
+    CATEGORY_MAPPING = {
+        'groceries': ['woolworths', 'coles', 'aldi', 'food', 'supermarket'],
+        'transport': ['uber', 'taxi', 'public transport', 'fuel'],
+        'entertainment': ['netflix', 'spotify', 'cinema', 'restaurant'],
+        'utilities': ['electricity', 'water', 'gas', 'internet'],
+        'work': ['office supplies', 'work equipment', 'professional development'],
+        'investment': ['shares', 'etf', 'stock', 'brokerage'],
+        'super': ['superannuation', 'retirement'],
+        'donation': ['charity', 'donation']
+    }
+
+    @staticmethod
+    def normalize_category(category: str) -> str:
+        """Map a raw category or merchant label to a standard category"""
+        category = category.lower()
+        for standard_category, keywords in DataProcessor.CATEGORY_MAPPING.items():
+            if any(keyword in category for keyword in keywords):
+                return standard_category
+        return 'other'  # default category
+
     @staticmethod
-    def normalize_categories(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def normalize_categories(transactions: Transactions) -> Transactions:
         """Normalize transaction categories to standard format"""
-        category_mapping = {
-            'groceries': ['woolworths', 'coles', 'aldi', 'food', 'supermarket'],
-            'transport': ['uber', 'taxi', 'public transport', 'fuel'],
-            'entertainment': ['netflix', 'spotify', 'cinema', 'restaurant'],
-            'utilities': ['electricity', 'water', 'gas', 'internet'],
-            'work': ['office supplies', 'work equipment', 'professional development'],
-            'investment': ['shares', 'etf', 'stock', 'brokerage'],
-            'super': ['superannuation', 'retirement'],
-            'donation': ['charity', 'donation']
-        }
-        
-        normalized_transactions = []
-        for transaction in transactions:
-            category = transaction['category'].lower()
-            normalized_category = 'other'  # default category
-            
-            # Find matching category
-            for standard_category, keywords in category_mapping.items():
-                if any(keyword in category for keyword in keywords):
-                    normalized_category = standard_category
-                    break
-            
-            normalized_transactions.append({
+        if isinstance(transactions, TransactionBatch):
+            # Only the distinct categories need matching against the keywords
+            normalized = [
+                DataProcessor.normalize_category(category)
+                for category in transactions.category_values
+            ]
+            return transactions.with_categories(np.array(normalized, dtype=object))
+
+        return [
+            {
                 **transaction,
-                'category': normalized_category
-            })
-        
-        return normalized_transactions
+                'category': DataProcessor.normalize_category(transaction['category'])
+            }
+            for transaction in transactions
+        ]
 
     @staticmethod
-    def calculate_spending_patterns(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_spending_patterns(transactions: Transactions) -> Dict[str, Any]:
         """Calculate spending patterns and statistics"""
-        df = pd.DataFrame(transactions)
+        df = DataProcessor._to_frame(transactions)
         df['amount'] = pd.to_numeric(df['amount'])
         df['date'] = pd.to_datetime(df['date'])
-        
+
         # Calculate daily spending
         daily_spending = df.groupby(df['date'].dt.date)['amount'].sum()
-        
+
         # Calculate category-wise spending
-        category_spending = df.groupby('category')['amount'].sum()
-        
+        category_spending = df.groupby('category', observed=True)['amount'].sum()
+
         # Calculate monthly trends
         monthly_trends = df.groupby(df['date'].dt.to_period('M'))['amount'].sum()
-        
+
         return {
-            'daily_spending': daily_spending.to_dict(),
+            'daily_spending': {
+                str(day): amount for day, amount in daily_spending.items()
+            },
             'category_spending': category_spending.to_dict(),
-            'monthly_trends': monthly_trends.to_dict(),
+            'monthly_trends': {
+                str(month): amount for month, amount in monthly_trends.items()
+            },
             'total_spent': df['amount'].sum(),
             'average_daily_spend': daily_spending.mean(),
             'spending_volatility': daily_spending.std()
         }
 
     @staticmethod
-    def detect_anomalies(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def detect_anomalies(transactions: Transactions) -> List[Dict[str, Any]]:
         """Detect anomalous transactions using statistical methods"""
-        df = pd.DataFrame(transactions)
+        df = DataProcessor._to_frame(transactions)
         df['amount'] = pd.to_numeric(df['amount'])
-        
+
         # Calculate z-scores
         mean = df['amount'].mean()
         std = df['amount'].std()
         df['z_score'] = (df['amount'] - mean) / std
-        
+
         # Identify anomalies (transactions with z-score > 3)
         anomalies = df[abs(df['z_score']) > 3].to_dict('records')
-        
+
         return anomalies
 
     @staticmethod
-    def calculate_savings_rate(transactions: List[Dict[str, Any]]) -> float:
+    def calculate_savings_rate(transactions: Transactions) -> float:
         """Calculate the savings rate from transactions"""
-        df = pd.DataFrame(transactions)
-        df['amount'] = pd.to_numeric(df['amount'])
-        
-        income = df[df['amount'] > 0]['amount'].sum()
-        expenses = abs(df[df['amount'] < 0]['amount'].sum())
-        
+        if isinstance(transactions, TransactionBatch):
+            amounts = transactions.amounts
+            income = amounts[amounts > 0].sum()
+            expenses = abs(amounts[amounts < 0].sum())
+        else:
+            df = pd.DataFrame(transactions)
+            df['amount'] = pd.to_numeric(df['amount'])
+
+            income = df[df['amount'] > 0]['amount'].sum()
+            expenses = abs(df[df['amount'] < 0]['amount'].sum())
+
         if income == 0:
             return 0.0
-        
-        return (income - expenses) / income 
\ No newline at end of file
+
+        return (income - expenses) / income
+
+    @staticmethod
+    def _to_frame(transactions: Transactions) -> pd.DataFrame:
+        if isinstance(transactions, TransactionBatch):
+            return transactions.to_frame()
+        return pd.DataFrame(transactions)
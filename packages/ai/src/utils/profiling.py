@@ -0,0 +1,279 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from types import CodeType
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+PROFILE_HEADER = b'x-profile'
+REQUEST_ID_HEADER = b'x-request-id'
+
+# Stacks whose innermost frame is in one of these files are threads parked on a
+# lock, queue or selector (idle executor workers, the event loop waiting for IO)
+_IDLE_FILES = ('threading.py', 'queue.py', 'selectors.py')
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler
+
+    A background thread snapshots every other thread's Python stack each
+    ``interval`` seconds. All threads are sampled because request handlers hand
+    their CPU work to executor threads; idle threads are dropped, so concurrent
+    requests only show up if they were doing work at the same time.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.thread_names: Dict[int, str] = {}
+        self.ticks = 0
+        self.elapsed = 0.0
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name='sampling-profiler', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[CodeType] = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if not stack or stack[0].co_filename.endswith(_IDLE_FILES):
+                    continue
+                if thread_id not in self.thread_names:
+                    self.thread_names.update(
+                        (t.ident, t.name) for t in threading.enumerate() if t.ident
+                    )
+                self.samples[(thread_id, tuple(reversed(stack)))] += 1
+
+    def collapsed(self) -> str:
+        """
+        Brendan Gregg collapsed-stack format, one ``thread;frame;...;frame count``
+        line per stack
+        """
+        lines = []
+        for (thread_id, stack), count in self.samples.most_common():
+            thread_name = self.thread_names.get(thread_id, str(thread_id))
+            frames = [thread_name] + [_frame_name(code) for code in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """Sampled profiles in speedscope's file format, one profile per thread"""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[CodeType, int] = {}
+        weight = self.elapsed / self.ticks if self.ticks else self.interval
+        profiles: Dict[int, Dict[str, Any]] = {}
+
+        for (thread_id, stack), count in self.samples.items():
+            indices = []
+            for code in stack:
+                if code not in frame_index:
+                    frame_index[code] = len(frames)
+                    frames.append({
+                        "name": _frame_name(code),
+                        "file": code.co_filename,
+                        "line": code.co_firstlineno
+                    })
+                indices.append(frame_index[code])
+
+            profile = profiles.setdefault(thread_id, {
+                "type": "sampled",
+                "name": self.thread_names.get(thread_id, str(thread_id)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.elapsed,
+                "samples": [],
+                "weights": []
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(count * weight)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "financial-advisor-ai",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values())
+        }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles selected requests
+
+    A request is profiled when it carries an ``X-Profile`` header matching
+    ``admin_token`` or is picked by ``sample_rate``. The handler runs under a
+    SamplingProfiler with tracemalloc tracking its allocation peak, and once the
+    response has been sent ``<request id>.collapsed``,
+    ``<request id>.speedscope.json`` and a ``<request id>.json`` summary are
+    written to ``output_dir``. The request id comes from ``X-Request-ID`` when
+    given and is echoed back in ``X-Profile-Id``.
+
+    Sampling and tracemalloc are process-wide, so only one request is profiled
+    at a time; others arriving meanwhile run normally. Only install the
+    middleware when profiling is configured: unselected requests still pay for
+    the header check.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[Scope, Receive, Send], Awaitable[None]],
+        output_dir: str = './profiles',
+        sample_rate: float = 0.0,
+        admin_token: Optional[str] = None,
+        interval: float = 0.001
+    ):
+        self.app = app
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token.encode() if admin_token else None
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope['type'] != 'http' or not self._selected(scope)
+                or not self._lock.acquire(blocking=False)):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._lock.release()
+
+    def _selected(self, scope: Scope) -> bool:
+        if self.admin_token is not None:
+            for name, value in scope['headers']:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.admin_token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_id = _request_id(scope)
+        status = {'code': None}
+
+        async def send_with_profile_id(message: Dict[str, Any]) -> None:
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                headers = message.get('headers', [])
+                profile_id = (b'x-profile-id', request_id.encode())
+                message = {**message, 'headers': [*headers, profile_id]}
+            await send(message)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        profiler = SamplingProfiler(self.interval)
+        profiler.start()
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            summary = {
+                "request_id": request_id,
+                "method": scope.get('method'),
+                "path": scope.get('path'),
+                "status_code": status['code'],
+                "duration_s": profiler.elapsed,
+                "samples": sum(profiler.samples.values()),
+                "tracemalloc_peak_bytes": peak - baseline,
+            }
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._write, request_id, profiler, summary
+            )
+
+    def _write(self, request_id: str, profiler: SamplingProfiler,
+               summary: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, request_id)
+            with open(f"{base}.collapsed", 'w') as f:
+                f.write(profiler.collapsed())
+            with open(f"{base}.speedscope.json", 'w') as f:
+                name = f"{summary['method']} {summary['path']} {request_id}"
+                json.dump(profiler.speedscope(name), f)
+            with open(f"{base}.json", 'w') as f:
+                json.dump(summary, f, indent=2)
+            peak_mb = summary['tracemalloc_peak_bytes'] / 1e6
+            logger.info(
+                f"Profiled {summary['method']} {summary['path']} as {request_id}: "
+                f"{summary['duration_s']:.3f}s, peak {peak_mb:.1f} MB allocated"
+            )
+        except OSError as e:
+            logger.warning(f"Could not write profile {request_id}: {str(e)}")
+
+
+def _request_id(scope: Scope) -> str:
+    for name, value in scope['headers']:
+        if name == REQUEST_ID_HEADER:
+            # The id becomes a file name, so keep it to a safe character set
+            request_id = re.sub(r'[^A-Za-z0-9_.-]', '_', value.decode('latin-1'))
+            request_id = request_id[:64].lstrip('.')
+            if request_id:
+                return request_id
+    return uuid.uuid4().hex
+
+
+def _frame_name(code: CodeType) -> str:
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def profiling_options_from_env() -> Optional[Dict[str, Any]]:
+    """
+    ProfilingMiddleware options from PROFILING_* settings, or None when
+    profiling is off
+    """
+    sample_rate = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+    admin_token = os.getenv('PROFILING_ADMIN_TOKEN') or None
+    if sample_rate <= 0 and admin_token is None:
+        return None
+    return {
+        "output_dir": os.getenv('PROFILING_DIR', './profiles'),
+        "sample_rate": sample_rate,
+        "admin_token": admin_token,
+        "interval": float(os.getenv('PROFILING_INTERVAL_MS', '1')) / 1000,
+    }
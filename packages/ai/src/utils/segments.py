@@ -0,0 +1,34 @@
+import numpy as np
+from typing import Sequence, Tuple
+
+
+def segment_ids(lengths: Sequence[int]) -> np.ndarray:
+    """Map every element of a concatenated array to the segment it came from"""
+    return np.repeat(np.arange(len(lengths)), np.asarray(lengths, dtype=np.intp))
+
+
+def segment_sum(values: np.ndarray, ids: np.ndarray, n_segments: int) -> np.ndarray:
+    """Sum values per segment"""
+    return np.bincount(ids, weights=values, minlength=n_segments)
+
+
+def segment_masked_stats(
+    values: np.ndarray, mask: np.ndarray, ids: np.ndarray, n_segments: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count, sum and population standard deviation of the masked values per segment.
+
+    Segments without any selected value get a count, sum and std of zero, which
+    matches ``np.std`` being skipped for empty lists in the per-request code.
+    """
+    weights = mask.astype(np.float64)
+    selected = np.where(mask, values, 0.0)
+    counts = np.bincount(ids, weights=weights, minlength=n_segments)
+    sums = np.bincount(ids, weights=selected, minlength=n_segments)
+
+    means = np.divide(sums, counts, out=np.zeros(n_segments), where=counts > 0)
+    deviations = np.where(mask, values - means[ids], 0.0)
+    squares = np.bincount(ids, weights=deviations * deviations, minlength=n_segments)
+    variances = np.divide(squares, counts, out=np.zeros(n_segments), where=counts > 0)
+
+    return counts, sums, np.sqrt(variances)
@@ -0,0 +1,133 @@
+import asyncio
+import numpy as np
+import pytest
+from datetime import datetime
+from src.models.financial_advisor import FinancialAdvisor
+from src.services.analysis_service import AnalysisService
+from src.services.batch_scheduler import BatchScheduler
+from src.utils.segments import segment_masked_stats
+
+@pytest.fixture
+def advisor():
+    return FinancialAdvisor()
+
+@pytest.fixture
+def sample_requests():
+    profile = {
+        "age": 30,
+        "annual_income": 100000.00,
+        "super_balance": 50000.00,
+        "emergency_fund": 20000.00,
+        "investment_assets": 30000.00,
+        "super_contributions": 25000.00,
+        "work_expenses": 5000.00,
+        "investment_diversity": 3
+    }
+    return [
+        ([{"date": datetime(2023, 1, 1), "amount": 5000.00, "category": "salary",
+           "description": "Salary"},
+          {"date": datetime(2023, 1, 15), "amount": -2000.00, "category": "rent",
+           "description": "Rent"},
+          {"date": datetime(2023, 1, 20), "amount": -150.50, "category": "food",
+           "description": "Groceries"}],
+         profile),
+        ([], {}),
+        ([{"date": datetime(2023, 2, 1), "amount": -80.00, "category": "transport",
+           "description": "Fuel"}],
+         {**profile, "emergency_fund": 1000.00}),
+    ]
+
+def test_analyze_batch_matches_single_requests(advisor, sample_requests):
+    batched = advisor.analyze_batch(sample_requests)
+
+    assert len(batched) == len(sample_requests)
+    for result, (transactions, profile) in zip(batched, sample_requests):
+        assert result == advisor.analyze_transactions(transactions, profile)
+
+def test_analyze_batch_segment_volatility(advisor, sample_requests):
+    amounts = np.array([5000.00, -2000.00, -150.50, -80.00])
+    ids = np.array([0, 0, 0, 2])
+
+    _, incomes, income_volatility = segment_masked_stats(amounts, amounts > 0, ids, 3)
+    _, expenses, expense_volatility = segment_masked_stats(
+        -amounts, amounts < 0, ids, 3
+    )
+
+    assert incomes.tolist() == [5000.00, 0.0, 0.0]
+    assert expenses.tolist() == [2150.50, 0.0, 80.00]
+    assert income_volatility.tolist() == [0.0, 0.0, 0.0]
+    assert expense_volatility == pytest.approx([924.75, 0.0, 0.0])
+    results = advisor.analyze_batch(sample_requests)
+    assert [result["risk_assessment"] for result in results] == [
+        "High risk: Significant income or expense volatility detected",
+        "Low risk: Stable financial situation",
+        "Medium risk: Insufficient emergency fund",
+    ]
+
+def test_scheduler_coalesces_concurrent_calls():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        scheduler = BatchScheduler(process, max_batch_size=10, window_ms=20)
+        results = await asyncio.gather(*(scheduler.submit(i) for i in range(5)))
+        return results, scheduler.stats()
+
+    results, stats = asyncio.run(run())
+
+    assert results == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert stats["batches"] == 1
+    assert stats["mean_fill_ratio"] == 0.5
+
+def test_scheduler_respects_max_batch_size():
+    sizes = []
+
+    def process(items):
+        sizes.append(len(items))
+        return items
+
+    async def run():
+        scheduler = BatchScheduler(process, max_batch_size=4, window_ms=20)
+        return await asyncio.gather(*(scheduler.submit(i) for i in range(10)))
+
+    assert asyncio.run(run()) == list(range(10))
+    assert sizes == [4, 4, 2]
+
+def test_scheduler_isolates_failing_item():
+    def process(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    async def run():
+        scheduler = BatchScheduler(process, max_batch_size=8, window_ms=10)
+        results = await asyncio.gather(
+            *(scheduler.submit(item) for item in ["a", "bad", "c"]),
+            return_exceptions=True
+        )
+        return results, scheduler.stats()
+
+    results, stats = asyncio.run(run())
+
+    assert results[0] == "A"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == "C"
+    assert stats["fallbacks"] == 1
+
+def test_analysis_service_returns_per_request_results(advisor, sample_requests):
+    async def run():
+        service = AnalysisService(advisor, max_batch_size=8, window_ms=10)
+        results = await asyncio.gather(
+            *(service.analyze_transactions(t, p) for t, p in sample_requests)
+        )
+        return results, service.batching_stats()
+
+    results, stats = asyncio.run(run())
+
+    assert results == advisor.analyze_batch(sample_requests)
+    assert stats["batches"] == 1
+    assert stats["requests"] == len(sample_requests)
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.models.financial_advisor import FinancialAdvisor
+from src.schemas.transactions import TransactionBatch
+from src.utils.chunked_analytics import (
+    ESTIMATED_ROW_BYTES,
+    ChunkedAnalyzer,
+    PartialAggregate,
+)
+from src.utils.data_processor import DataProcessor
+
+def make_history(n=2000, seed=3):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 5 * 365, n)
+    dates = pd.Timestamp("2019-01-01") + pd.to_timedelta(days, unit="D")
+    amounts = np.round(rng.normal(-60, 40, n), 2)
+    amounts[rng.random(n) < 0.05] = 4200.0
+    amounts[7] = -25000.0
+    categories = rng.choice(["Groceries", "Uber", "Netflix", "Salary", "Rent"], n)
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%dT%H:%M:%S"),
+        "amount": amounts,
+        "category": categories,
+        "merchant": rng.choice(["Coles", "Aldi", "Employer", "Landlord"], n),
+    })
+
+@pytest.fixture
+def history_csv(tmp_path):
+    path = tmp_path / "history.csv"
+    make_history().to_csv(path, index=False)
+    return str(path)
+
+@pytest.fixture
+def full_batch(history_csv):
+    return TransactionBatch.from_frame(pd.read_csv(history_csv))
+
+def assert_patterns_equal(chunked, full):
+    assert chunked.keys() == full.keys()
+    for key in ("daily_spending", "category_spending", "monthly_trends"):
+        assert list(chunked[key]) == list(full[key])
+        assert np.allclose(list(chunked[key].values()), list(full[key].values()))
+    for key in ("total_spent", "average_daily_spend", "spending_volatility"):
+        assert chunked[key] == pytest.approx(full[key])
+
+def test_chunked_results_match_full_history(history_csv, full_batch):
+    analyzer = ChunkedAnalyzer(chunk_rows=150)
+
+    result = analyzer.analyze(history_csv)
+
+    assert result["transaction_count"] == len(full_batch)
+    patterns = DataProcessor.calculate_spending_patterns(full_batch)
+    assert_patterns_equal(result["spending_patterns"], patterns)
+    savings_rate = DataProcessor.calculate_savings_rate(full_batch)
+    assert result["savings_rate"] == pytest.approx(savings_rate)
+
+    expected = DataProcessor.detect_anomalies(full_batch)
+    anomalies = result["anomalies"]
+    assert [(a["date"], a["amount"]) for a in anomalies] == \
+        [(a["date"], a["amount"]) for a in expected]
+    assert np.allclose([a["z_score"] for a in anomalies],
+                       [a["z_score"] for a in expected])
+
+def test_merge_is_independent_of_chunking(full_batch):
+    def aggregate(chunk_rows):
+        frame = full_batch.to_frame()
+        result = PartialAggregate()
+        for start in range(0, len(frame), chunk_rows):
+            chunk = TransactionBatch.from_frame(frame[start:start + chunk_rows])
+            result.merge(PartialAggregate.from_batch(chunk))
+        return result
+
+    whole, pieces = aggregate(len(full_batch)), aggregate(37)
+
+    for name in ("amounts", "income", "expenses"):
+        a, b = getattr(whole, name), getattr(pieces, name)
+        assert a.count == b.count
+        assert a.total == pytest.approx(b.total)
+        assert a.std(ddof=1) == pytest.approx(b.std(ddof=1))
+    assert whole.amounts.std(ddof=1) == \
+        pytest.approx(np.std(full_batch.amounts, ddof=1))
+    assert whole.time_span_days() == pieces.time_span_days() == \
+        full_batch.time_span_days()
+
+def test_analyze_history_matches_analyze_transactions(history_csv, full_batch,
+                                                      tmp_path):
+    advisor = FinancialAdvisor(str(tmp_path / "models"))
+    profile = {
+        "age": 40,
+        "annual_income": 90000,
+        "super_balance": 150000,
+        "emergency_fund": 1000,
+    }
+
+    chunked = advisor.analyze_history(
+        history_csv, profile, ChunkedAnalyzer(chunk_rows=200)
+    )
+    full = advisor.analyze_transactions(full_batch, profile)
+
+    assert chunked["metrics"] == pytest.approx(full["metrics"])
+    for key in ("tax_optimization", "retirement_planning", "risk_assessment",
+                "confidence_score"):
+        assert chunked[key] == full[key]
+
+def test_process_pool_matches_serial(history_csv):
+    serial = ChunkedAnalyzer(chunk_rows=300).analyze(history_csv)
+    parallel = ChunkedAnalyzer(chunk_rows=300, n_workers=2).analyze(history_csv)
+
+    assert_patterns_equal(parallel["spending_patterns"], serial["spending_patterns"])
+    assert len(parallel["anomalies"]) == len(serial["anomalies"])
+
+def test_callable_source_and_normalized_categories(full_batch):
+    records = full_batch.to_records()
+    requested = []
+
+    def store(chunk_rows):
+        requested.append(chunk_rows)
+        for start in range(0, len(records), chunk_rows):
+            yield records[start:start + chunk_rows]
+
+    analyzer = ChunkedAnalyzer(chunk_rows=500, normalize_categories=True)
+    patterns = analyzer.aggregate(store).spending_patterns()
+
+    expected = DataProcessor.calculate_spending_patterns(
+        DataProcessor.normalize_categories(full_batch)
+    )
+    assert requested == [500]
+    assert_patterns_equal(patterns, expected)
+
+def test_chunk_size_follows_memory_budget():
+    budget = 64 * 1024 * 1024
+
+    serial = ChunkedAnalyzer(memory_budget_bytes=budget)
+    pooled = ChunkedAnalyzer(memory_budget_bytes=budget, n_workers=4)
+
+    assert serial.chunk_rows * ESTIMATED_ROW_BYTES * 2 <= budget
+    in_flight = pooled.max_in_flight + 1
+    assert pooled.chunk_rows * ESTIMATED_ROW_BYTES * in_flight <= budget
+    assert pooled.chunk_rows < serial.chunk_rows
+    with pytest.raises(ValueError):
+        ChunkedAnalyzer(memory_budget_bytes=100)
\ No newline at end of file
@@ -62,7 +62,8 @@ def test_generate_retirement_advice(advisor, sample_user_profile):
     assert len(advice) > 0
 
 def test_assess_risk(advisor, sample_transactions, sample_user_profile):
-    risk = advisor._assess_risk(sample_user_profile, sample_transactions)
+    result = advisor.analyze_transactions(sample_transactions, sample_user_profile)
+    risk = result["risk_assessment"]
     assert isinstance(risk, str)
     assert risk in ["High risk: Significant income or expense volatility detected",
                    "Medium risk: Insufficient emergency fund",
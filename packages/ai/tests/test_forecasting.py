@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from datetime import datetime
+from sklearn.ensemble import GradientBoostingRegressor
+from src.models.financial_advisor import FinancialAdvisor
+from src.models.forecasting import CashFlowForecaster
+
+def transaction(date, amount, category="Food", description="Spend"):
+    return {
+        "date": date, "amount": amount, "category": category, "description": description
+    }
+
+def monthly_history(months, salary=5000.0, spend=-3000.0, december_extra=0.0,
+                    start_year=2021):
+    transactions = []
+    for i in range(months):
+        year, month = start_year + i // 12, i % 12 + 1
+        salary_date = datetime(year, month, 1)
+        transactions.append(transaction(salary_date, salary, "Salary", "Pay"))
+        amount = spend + (december_extra if month == 12 else 0.0)
+        transactions.append(transaction(datetime(year, month, 15), amount))
+    return transactions
+
+@pytest.fixture
+def forecaster():
+    return CashFlowForecaster(history_months=36)
+
+def test_monthly_series_masks_months_before_history(forecaster):
+    series, end = forecaster.monthly_series(
+        [monthly_history(36), monthly_history(2, start_year=2023)[:2]]
+    )
+
+    assert str(end) == "2023-12"
+    assert series.shape == (2, 36)
+    assert np.allclose(series[0], 2000.0)
+    assert np.isnan(series[1, :24]).all()
+    assert series[1, 24] == 2000.0
+
+def test_seasonal_baseline_captures_december_spending(forecaster):
+    history = monthly_history(36, december_extra=-4000.0)
+
+    forecast, baseline, end = forecaster.forecast(
+        [history, monthly_history(36)], horizon=12
+    )
+
+    assert forecast.shape == (2, 12)
+    assert np.array_equal(forecast, baseline)
+    december = 11
+    assert forecast[0, december] < forecast[0, :december].min() - 2000
+    assert np.allclose(forecast[1], 2000.0)
+
+def test_seasonal_month_is_not_counted_twice(forecaster):
+    # +1000 a month, except a net 0 every December
+    history = [
+        transaction(datetime(2022 + i // 12, i % 12 + 1, 1),
+                    0.0 if i % 12 == 11 else 1000.0, "Salary", "Pay")
+        for i in range(24)
+    ]
+
+    _, baseline, end = forecaster.forecast([history], horizon=12)
+
+    assert str(end) == "2023-12"
+    assert baseline[0, :11] == pytest.approx(1000.0)
+    assert baseline[0, 11] == pytest.approx(0.0)
+
+def test_residual_model_predicts_once_for_all_users(forecaster):
+    histories = [
+        monthly_history(36, salary=4000.0 + 100 * i, december_extra=-500.0 * (i % 3))
+        for i in range(20)
+    ]
+    model = forecaster.fit_residual_model(
+        histories, GradientBoostingRegressor(n_estimators=20, random_state=0)
+    )
+
+    calls = []
+    predict = model.predict
+    model.predict = lambda X: calls.append(len(X)) or predict(X)
+
+    forecast, baseline, _ = forecaster.forecast(histories, horizon=6, model=model)
+
+    assert calls == [20 * 6]
+    assert forecast.shape == baseline.shape == (20, 6)
+
+def test_forecast_many_caches_until_history_changes(forecaster):
+    histories = {"alice": monthly_history(12), "bob": monthly_history(24)}
+
+    first = forecaster.forecast_many(histories, horizon=3)
+    assert first["alice"]["months"] == ["2023-01", "2023-02", "2023-03"]
+    assert len(forecaster.cache) == 2
+
+    second = forecaster.forecast_many(histories, horizon=3)
+    assert second["alice"] is first["alice"]
+
+    histories["alice"] = histories["alice"] + [
+        transaction(datetime(2022, 12, 20), -900.0)
+    ]
+    third = forecaster.forecast_many(histories, horizon=3)
+    assert third["alice"] is not first["alice"]
+    assert third["bob"] is first["bob"]
+
+    forecaster.cache.invalidate("bob")
+    assert forecaster.forecast_many(histories, horizon=3)["bob"] is not first["bob"]
+
+def test_forecast_many_recomputes_corrected_history(forecaster):
+    history = [
+        transaction(datetime(2024, 1, 10), -500.0),
+        transaction(datetime(2024, 6, 1), 1000.0, "Salary", "Pay"),
+    ]
+    first = forecaster.forecast_many({"alice": history}, horizon=1, as_of="2024-06")
+
+    # Same count, total and latest date, but the expense moved to May
+    corrected = [{**history[0], "date": datetime(2024, 5, 10)}, history[1]]
+    second = forecaster.forecast_many({"alice": corrected}, horizon=1, as_of="2024-06")
+
+    assert second["alice"] is not first["alice"]
+    expected, _, _ = forecaster.forecast([corrected], 1, end_month="2024-06")
+    assert second["alice"]["net_cash_flow"] == expected[0].tolist()
+
+def test_forecast_many_keys_cache_by_model(forecaster):
+    histories = [monthly_history(24, salary=4000.0 + 100 * i) for i in range(5)]
+    old_model, new_model = (
+        forecaster.fit_residual_model(
+            histories, GradientBoostingRegressor(n_estimators=5, random_state=seed)
+        )
+        for seed in (0, 1)
+    )
+
+    old = forecaster.forecast_many({"alice": histories[0]}, horizon=3, model=old_model)
+    new = forecaster.forecast_many({"alice": histories[0]}, horizon=3, model=new_model)
+
+    assert new["alice"] is not old["alice"]
+
+def test_forecast_horizon_is_bounded(forecaster):
+    with pytest.raises(ValueError):
+        forecaster.forecast([monthly_history(12)], horizon=13)
+
+def test_advisor_forecast_savings():
+    advisor = FinancialAdvisor()
+
+    forecasts = advisor.forecast_savings(
+        {"alice": monthly_history(12)}, horizon_months=3, as_of="2021-12"
+    )
+
+    assert forecasts["alice"]["as_of"] == "2021-12"
+    savings = forecasts["alice"]["cumulative_savings"]
+    assert savings == pytest.approx([2000.0, 4000.0, 6000.0])
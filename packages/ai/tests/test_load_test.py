@@ -0,0 +1,95 @@
+import asyncio
+import json
+import random
+import httpx
+import pytest
+from load_test import (
+    LoadGenerator,
+    LoadTestResult,
+    load_app,
+    make_client,
+    parse_size_distribution,
+)
+
+def test_parse_size_distribution():
+    rng = random.Random(0)
+
+    assert parse_size_distribution("fixed:25")(rng) == 25
+    uniform = parse_size_distribution("uniform:10:20")
+    lognormal = parse_size_distribution("lognormal:50:1.0")
+    assert all(10 <= uniform(rng) <= 20 for _ in range(50))
+    assert all(lognormal(rng) >= 1 for _ in range(50))
+    assert parse_size_distribution("choice:5,7")(rng) in (5, 7)
+
+    with pytest.raises(ValueError):
+        parse_size_distribution("normal:5")
+
+def test_summary_percentiles_and_error_rate():
+    result = LoadTestResult(latencies=[i / 1000 for i in range(1, 101)], elapsed=2.0)
+    result.statuses.update({200: 95, 500: 5})
+    result.errors["ConnectTimeout"] += 1
+
+    summary = result.summary()
+
+    assert summary["requests"] == 101
+    assert summary["failures"] == 6
+    assert summary["throughput_rps"] == 50.5
+    assert summary["latency_ms"]["p50"] == pytest.approx(50.5)
+    assert summary["latency_ms"]["p99"] == pytest.approx(99.01)
+    assert summary["latency_ms"]["max"] == 100.0
+
+def test_closed_loop_against_in_process_app():
+    async def run():
+        async with make_client(app=load_app("main:app")) as client:
+            generator = LoadGenerator(
+                client, parse_size_distribution("uniform:5:50"),
+                concurrency=4, requests=20, payload_pool=5, seed=1
+            )
+            return (await generator.run()).summary()
+
+    summary = asyncio.run(run())
+
+    assert summary["requests"] == 20
+    assert summary["failures"] == 0
+    assert summary["latency_ms"]["p95"] is not None
+
+def test_open_loop_against_in_process_app():
+    async def run():
+        async with make_client(app=load_app("main:app")) as client:
+            generator = LoadGenerator(
+                client, parse_size_distribution("fixed:10"),
+                concurrency=4, rate=200, requests=15, payload_pool=3
+            )
+            return (await generator.run()).summary()
+
+    summary = asyncio.run(run())
+
+    assert summary["requests"] == 15
+    assert summary["status_codes"] == {"200": 15}
+
+def test_payloads_are_encoded_once():
+    sent = []
+
+    def handler(request):
+        sent.append((request.content, request.headers["content-type"]))
+        return httpx.Response(200, json={})
+
+    async def run():
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://loadtest"
+        )
+        async with client:
+            generator = LoadGenerator(
+                client, parse_size_distribution("fixed:3"),
+                requests=5, payload_pool=2, seed=0
+            )
+            await generator.run()
+            return generator
+
+    generator = asyncio.run(run())
+
+    bodies = [body for _, body in generator.payloads]
+    assert all(isinstance(body, bytes) for body in bodies)
+    assert all(content in bodies for content, _ in sent)
+    assert {content_type for _, content_type in sent} == {"application/json"}
+    assert len(json.loads(sent[0][0])["transactions"]) == 3
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
+from src.models.financial_advisor import FinancialAdvisor
+from src.models.registry import (
+    ModelArtifactError,
+    ModelRegistry,
+    ModelSet,
+    ModelWatcher,
+)
+
+def fitted_models(seed=0):
+    rng = np.random.default_rng(seed)
+    X, y = rng.normal(size=(40, 4)), rng.integers(0, 2, 40)
+
+    def forest():
+        return RandomForestClassifier(n_estimators=5, random_state=seed)
+
+    def boosting():
+        return GradientBoostingRegressor(n_estimators=5, random_state=seed)
+
+    return {
+        "spending_classifier": forest().fit(X, y),
+        "savings_predictor": boosting().fit(X, X[:, 0]),
+        "risk_assessor": forest().fit(X, y),
+        "tax_optimizer": boosting().fit(X, X[:, 1]),
+    }
+
+@pytest.fixture
+def model_path(tmp_path):
+    return str(tmp_path / "models")
+
+def publish(model_path, seed=0):
+    advisor = FinancialAdvisor(model_path)
+    for name, model in fitted_models(seed).items():
+        setattr(advisor, name, model)
+    return advisor.save_models()
+
+def test_save_models_publishes_verified_version(model_path):
+    version = publish(model_path)
+    registry = ModelRegistry(model_path)
+
+    assert registry.current_version() == version
+    assert registry.versions() == [version]
+    version_dir = os.path.join(model_path, "versions", version)
+    assert os.path.exists(os.path.join(version_dir, "manifest.json"))
+
+    advisor = FinancialAdvisor(model_path)
+    assert advisor.model_version == version
+    assert advisor.risk_assessor.n_estimators == 5
+
+def test_corrupted_version_is_rejected(model_path):
+    version = publish(model_path)
+    version_dir = os.path.join(model_path, "versions", version)
+    with open(os.path.join(version_dir, "risk_assessor.joblib"), "ab") as f:
+        f.write(b"truncated")
+
+    with pytest.raises(ModelArtifactError):
+        ModelRegistry(model_path).load(version)
+
+    advisor = FinancialAdvisor(model_path)
+    assert advisor.model_version is None
+    assert not hasattr(advisor.risk_assessor, "estimators_")
+
+def test_incomplete_versions_are_ignored(model_path):
+    version = publish(model_path)
+    os.makedirs(os.path.join(model_path, "versions", ".tmp-partial"))
+    os.makedirs(os.path.join(model_path, "versions", "20990101T000000000000Z-partial"))
+
+    assert ModelRegistry(model_path).versions() == [version]
+
+def test_legacy_flat_models_are_loaded(model_path):
+    os.makedirs(model_path)
+    for name, model in fitted_models().items():
+        joblib.dump(model, os.path.join(model_path, f"{name}.joblib"))
+
+    advisor = FinancialAdvisor(model_path)
+
+    assert advisor.model_version is None
+    assert hasattr(advisor.tax_optimizer, "estimators_")
+
+def test_watcher_swaps_to_new_version_after_warm_up(model_path):
+    publish(model_path, seed=0)
+    advisor = FinancialAdvisor(model_path)
+    in_flight = advisor.models
+    warmed = []
+    watcher = ModelWatcher(advisor, warmup=lambda models: warmed.append(models.version))
+
+    assert not watcher.check()
+
+    new_version = publish(model_path, seed=1)
+    assert watcher.check()
+
+    assert warmed == [new_version]
+    assert advisor.model_version == new_version
+    assert in_flight.version != new_version
+    assert in_flight.risk_assessor is not advisor.risk_assessor
+
+def test_watcher_keeps_serving_when_warm_up_fails(model_path):
+    old_version = publish(model_path, seed=0)
+    advisor = FinancialAdvisor(model_path)
+
+    def broken_warm_up(models):
+        raise RuntimeError("warm-up failed")
+
+    watcher = ModelWatcher(advisor, warmup=broken_warm_up)
+    publish(model_path, seed=1)
+
+    assert not watcher.check()
+    assert advisor.model_version == old_version
+
+def test_save_models_keeps_set_swapped_in_while_publishing(model_path):
+    advisor = FinancialAdvisor(model_path)
+    swapped = ModelSet(**fitted_models(1), version="watcher")
+    publish_version = advisor.registry.publish
+
+    def publish_then_swap(models, **kwargs):
+        version = publish_version(models, **kwargs)
+        advisor.install_models(swapped)
+        return version
+
+    advisor.registry.publish = publish_then_swap
+    version = advisor.save_models()
+
+    assert advisor.models is swapped
+    assert advisor.model_version == "watcher" != version
+
+def test_prune_keeps_current_version(model_path):
+    versions = [publish(model_path, seed=i) for i in range(3)]
+    registry = ModelRegistry(model_path)
+    registry.activate(versions[0])
+
+    removed = registry.prune(keep=1)
+
+    assert removed == [versions[1]]
+    assert registry.versions() == [versions[0], versions[2]]
+
+def test_both_apps_run_a_model_watcher():
+    from fastapi.testclient import TestClient
+    import main
+    import src.main
+
+    apps = ((main, main.advisor), (src.main, src.main.analysis_service.advisor))
+    for module, advisor in apps:
+        assert module.model_watcher.advisor is advisor
+        with TestClient(module.app):
+            assert module.model_watcher._thread.is_alive()
+        assert module.model_watcher._thread is None
\ No newline at end of file
@@ -0,0 +1,83 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.utils.profiling import (
+    ProfilingMiddleware,
+    SamplingProfiler,
+    profiling_options_from_env,
+)
+
+def busy_work():
+    return sum(i * i for i in range(200000))
+
+@pytest.fixture
+def make_client(tmp_path):
+    def make(**options):
+        app = FastAPI()
+
+        @app.get("/work")
+        def work():
+            return {"result": busy_work()}
+
+        app.add_middleware(ProfilingMiddleware, output_dir=str(tmp_path), **options)
+        return TestClient(app)
+    return make
+
+def test_admin_header_writes_profiles(make_client, tmp_path):
+    client = make_client(admin_token="secret")
+
+    response = client.get(
+        "/work", headers={"X-Profile": "secret", "X-Request-ID": "req/42"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["x-profile-id"] == "req_42"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "req_42.collapsed", "req_42.json", "req_42.speedscope.json"
+    ]
+
+    summary = json.loads((tmp_path / "req_42.json").read_text())
+    assert summary["path"] == "/work"
+    assert summary["status_code"] == 200
+    assert summary["tracemalloc_peak_bytes"] > 0
+
+    speedscope = json.loads((tmp_path / "req_42.speedscope.json").read_text())
+    assert speedscope["profiles"]
+    assert any("busy_work" in frame["name"] for frame in speedscope["shared"]["frames"])
+    assert "busy_work" in (tmp_path / "req_42.collapsed").read_text()
+
+def test_unselected_requests_are_not_profiled(make_client, tmp_path):
+    client = make_client(admin_token="secret")
+
+    assert "x-profile-id" not in client.get("/work").headers
+    wrong_token = client.get("/work", headers={"X-Profile": "wrong"})
+    assert "x-profile-id" not in wrong_token.headers
+    assert list(tmp_path.iterdir()) == []
+
+def test_sample_rate_selects_requests(make_client, tmp_path):
+    client = make_client(sample_rate=1.0)
+
+    profile_id = client.get("/work").headers["x-profile-id"]
+
+    assert (tmp_path / f"{profile_id}.speedscope.json").exists()
+
+def test_collapsed_stack_format():
+    profiler = SamplingProfiler(interval=0.0005)
+    profiler.start()
+    busy_work()
+    profiler.stop()
+
+    lines = profiler.collapsed().strip().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert ";" in stack
+
+def test_profiling_disabled_without_configuration(monkeypatch):
+    monkeypatch.delenv("PROFILING_ADMIN_TOKEN", raising=False)
+    monkeypatch.delenv("PROFILING_SAMPLE_RATE", raising=False)
+    assert profiling_options_from_env() is None
+
+    monkeypatch.setenv("PROFILING_SAMPLE_RATE", "0.01")
+    assert profiling_options_from_env()["sample_rate"] == 0.01
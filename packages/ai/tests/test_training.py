@@ -0,0 +1,176 @@
+import json
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from src.models.financial_advisor import FinancialAdvisor
+from src.models.forecasting import CashFlowForecaster
+from src.schemas import TransactionValidationError
+from src.training import (
+    FEATURE_NAMES,
+    FeatureCache,
+    ModelTrainer,
+    extract_features,
+    load_users,
+)
+
+def make_users(n, seed=0):
+    rng = np.random.default_rng(seed)
+    users = []
+    for i in range(n):
+        size = int(rng.integers(1, 40))
+        transactions = [
+            {
+                "date": datetime(2023, 1, 1) + timedelta(days=int(day)),
+                "amount": float(amount),
+                "category": "Food",
+                "description": "Sample"
+            }
+            for day, amount in zip(rng.integers(0, 365, size),
+                                   rng.normal(-50, 400, size).round(2))
+        ]
+        profile = {"age": 20 + i % 40, "annual_income": 50000 + 1000 * i,
+                   "super_balance": 10000.0 * i, "emergency_fund": 5000.0,
+                   "investment_diversity": i % 5}
+        users.append((transactions, profile))
+    return users
+
+@pytest.fixture
+def users():
+    return make_users(60)
+
+@pytest.fixture
+def targets(users):
+    features = extract_features(users)
+    savings_rate = features[:, FEATURE_NAMES.index("savings_rate")]
+    return {
+        "spending_classifier": (savings_rate > 0).astype(int),
+        "risk_assessor": np.where(np.arange(len(users)) % 3 == 0, "high", "low"),
+    }
+
+def test_features_match_advisor_metrics(users):
+    advisor = FinancialAdvisor()
+    features = extract_features(users)
+    results = advisor.analyze_batch(users)
+
+    assert features.shape == (len(users), len(FEATURE_NAMES))
+    for row, result in zip(features, results):
+        metrics = result["metrics"]
+        assert row[FEATURE_NAMES.index("total_income")] == \
+            pytest.approx(metrics["total_income"])
+        assert row[FEATURE_NAMES.index("savings_rate")] == \
+            pytest.approx(metrics["savings_rate"])
+    assert features[0, FEATURE_NAMES.index("work_expenses")] == 0
+
+def write_jsonl(path, users, targets):
+    with open(path, "w") as f:
+        for i, (transactions, profile) in enumerate(users):
+            record_targets = {
+                name: values[i].item() for name, values in targets.items()
+            }
+            if i == 5:
+                del record_targets["risk_assessor"]
+            f.write(json.dumps({"transactions": transactions, "user_profile": profile,
+                                "targets": record_targets}, default=str) + "\n")
+
+def test_load_users_decodes_in_parallel_chunks(users, targets, tmp_path):
+    path = str(tmp_path / "users.jsonl")
+    write_jsonl(path, users, targets)
+    forecaster = CashFlowForecaster()
+
+    serial = load_users(path, chunk_size=16, n_jobs=1)
+    parallel = load_users(path, chunk_size=16, n_jobs=2)
+
+    for features, monthly, loaded_targets in (serial, parallel):
+        np.testing.assert_allclose(features, extract_features(users))
+        np.testing.assert_allclose(
+            forecaster.residual_training_set([t for t, _ in monthly])[1],
+            forecaster.residual_training_set([t for t, _ in users])[1]
+        )
+        assert [profile for _, profile in monthly] == \
+            [profile for _, profile in users]
+        assert loaded_targets["spending_classifier"] == \
+            targets["spending_classifier"].tolist()
+        assert loaded_targets["risk_assessor"][5] is None
+        assert loaded_targets["risk_assessor"][6] == targets["risk_assessor"][6]
+
+def test_load_users_reports_the_invalid_user(users, targets, tmp_path):
+    path = str(tmp_path / "users.jsonl")
+    users[20][0][0]["amount"] = "lots"
+    write_jsonl(path, users, targets)
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        load_users(path, chunk_size=16)
+
+    assert excinfo.value.errors == [
+        {"loc": [20, "transactions", 0, "amount"], "msg": "value is not a valid float"}
+    ]
+
+def test_feature_cache_is_memory_mapped(users, tmp_path):
+    cache = FeatureCache(str(tmp_path))
+    features = extract_features(users)
+
+    assert cache.load("snapshot") is None
+    cache.store("snapshot", features)
+    cached = cache.load("snapshot")
+
+    assert isinstance(cached, np.memmap)
+    np.testing.assert_array_equal(cached, features)
+
+def test_train_fits_and_persists_models(users, targets, tmp_path):
+    advisor = FinancialAdvisor(str(tmp_path / "models"))
+    trainer = ModelTrainer(advisor, n_jobs=2, cache_dir=str(tmp_path / "cache"))
+
+    report = trainer.train(users, targets, cache_key="snapshot")
+
+    assert sorted(report.trained) == sorted([*targets, "savings_predictor"])
+    assert report.skipped == ["tax_optimizer"]
+    assert not report.feature_cache_hit
+    stages = {"extract_features", "fit_risk_assessor", "save_models", "total"}
+    assert stages <= set(report.timings)
+
+    reloaded = FinancialAdvisor(str(tmp_path / "models"))
+    features = extract_features(users)
+    np.testing.assert_array_equal(reloaded.risk_assessor.predict(features),
+                                  advisor.risk_assessor.predict(features))
+
+def test_retraining_warm_starts_fitted_models(users, targets, tmp_path):
+    advisor = FinancialAdvisor(str(tmp_path / "models"))
+    trainer = ModelTrainer(advisor, cache_dir=str(tmp_path / "cache"),
+                           warm_start_estimators=10)
+    trainer.train(users, targets, cache_key="snapshot", save=False)
+    first_trees = advisor.risk_assessor.n_estimators
+
+    report = trainer.train(users, targets, cache_key="snapshot", save=False)
+
+    assert report.feature_cache_hit
+    assert "risk_assessor" in report.warm_started
+    assert advisor.risk_assessor.n_estimators == first_trees + 10
+    assert len(advisor.risk_assessor.estimators_) == first_trees + 10
+
+def test_warm_starts_are_capped_by_max_estimators(users, targets, tmp_path):
+    advisor = FinancialAdvisor(str(tmp_path / "models"))
+    trainer = ModelTrainer(advisor, warm_start_estimators=10, max_estimators=170)
+    trainer.train(users, targets, save=False)
+
+    sizes, warm_started = [], []
+    for _ in range(3):
+        report = trainer.train(users, targets, save=False)
+        sizes.append(advisor.risk_assessor.n_estimators)
+        warm_started.append("risk_assessor" in report.warm_started)
+
+    assert sizes == [160, 170, 150]
+    assert warm_started == [True, True, False]
+    assert len(advisor.risk_assessor.estimators_) == 150
+
+def test_training_does_not_touch_serving_models(users, targets, tmp_path):
+    advisor = FinancialAdvisor(str(tmp_path / "models"))
+    trainer = ModelTrainer(advisor, warm_start_estimators=10)
+    trainer.train(users, targets, save=False)
+    serving = advisor.models
+    trees = list(serving.risk_assessor.estimators_)
+
+    trainer.train(users, targets, save=False)
+
+    assert advisor.models is not serving
+    assert serving.risk_assessor.estimators_ == trees
+    assert serving.risk_assessor.n_estimators == 150
\ No newline at end of file
@@ -0,0 +1,250 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from main import app
+from src.models.financial_advisor import FinancialAdvisor
+from src.schemas import (
+    TransactionBatch,
+    TransactionRow,
+    TransactionValidationError,
+    decode_analysis_request,
+    parse_json,
+)
+from src.utils.data_processor import DataProcessor
+
+LUNCH = {
+    "date": "2024-01-01", "amount": 10.0, "category": "Food", "description": "Lunch"
+}
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+@pytest.fixture
+def sample_records():
+    return [
+        {"date": "2023-01-01T00:00:00", "amount": 5000.00, "category": "Salary",
+         "description": "Monthly salary"},
+        {"date": "2023-01-15", "amount": -2000.00, "category": "Rent",
+         "description": "Monthly rent"},
+        {"date": datetime(2023, 2, 3), "amount": "-85.5", "category": "Woolworths",
+         "description": "Groceries"},
+        {"date": "2023-03-01T09:30:00", "amount": -40, "category": "Uber",
+         "merchant": "Uber trip"},
+    ]
+
+@pytest.fixture
+def sample_user_profile():
+    return {
+        "age": 30,
+        "annual_income": 100000.00,
+        "super_balance": 50000.00,
+        "emergency_fund": 20000.00,
+        "investment_assets": 30000.00,
+        "super_contributions": 25000.00,
+        "work_expenses": 5000.00,
+        "investment_diversity": 3
+    }
+
+def test_from_records_decodes_columns(sample_records):
+    batch = TransactionBatch.from_records(sample_records)
+
+    assert len(batch) == 4
+    assert batch.amounts.dtype == np.float64
+    assert batch.amounts.tolist() == [5000.0, -2000.0, -85.5, -40.0]
+    assert batch.dates.dtype == np.dtype("datetime64[ns]")
+    assert batch.categories.tolist() == ["Salary", "Rent", "Woolworths", "Uber"]
+    assert batch.descriptions[-1] == "Uber trip"
+    assert batch.time_span_days() == 59
+
+def test_from_records_reports_invalid_fields():
+    records = [
+        {**LUNCH, "date": "2023-01-01", "amount": "lots"},
+        {"date": "2023-01-02", "amount": 10.0, "description": "Missing category"},
+    ]
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        TransactionBatch.from_records(records, loc=("body",))
+
+    assert excinfo.value.errors == [
+        {"loc": ["body", 1, "category"], "msg": "field required"}
+    ]
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        TransactionBatch.from_records(records[:1])
+
+    assert excinfo.value.errors == [
+        {"loc": [0, "amount"], "msg": "value is not a valid float"}
+    ]
+
+@pytest.mark.parametrize("field,value,msg", [
+    ("category", {"name": "Food"}, "str type expected"),
+    ("description", ["Lunch"], "str type expected"),
+    ("amount", [1, 2], "value is not a valid float"),
+    ("date", ["2024-01-01"], "invalid datetime format"),
+    ("date", {"year": 2024}, "invalid datetime format"),
+])
+def test_from_records_rejects_non_scalar_fields(field, value, msg):
+    records = [{**LUNCH, field: value}, LUNCH, {**LUNCH, field: value}]
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        TransactionBatch.from_records(records, loc=("body",))
+
+    assert excinfo.value.errors == [
+        {"loc": ["body", 0, field], "msg": msg},
+        {"loc": ["body", 2, field], "msg": msg},
+    ]
+
+def test_from_frame_rejects_non_scalar_columns():
+    frame = pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-02"],
+        "amount": [[1, 2], [3, 4]],
+        "category": [{"a": 1}, "Food"],
+        "description": ["Lunch", "Dinner"],
+    })
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        TransactionBatch.from_frame(frame)
+    assert excinfo.value.errors[0]["loc"] == [0, "amount"]
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        TransactionBatch.from_frame(frame.assign(amount=[1.0, 2.0]))
+    assert excinfo.value.errors == [
+        {"loc": [0, "category"], "msg": "str type expected"}
+    ]
+
+def test_analyze_endpoint_returns_422_for_non_scalar_fields(sample_user_profile):
+    client = TestClient(app)
+    invalid = [
+        ("category", {"a": 1}),
+        ("description", [1]),
+        ("amount", [1, 2]),
+        ("date", ["2024-01-01"]),
+    ]
+
+    for field, value in invalid:
+        response = client.post("/analyze", json={
+            "transactions": [{**LUNCH, field: value}] * 2,
+            "user_profile": sample_user_profile
+        })
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "transactions", 0, field]
+
+def test_parse_json_compacts_transactions(sample_records, sample_user_profile):
+    records = TransactionBatch.from_records(sample_records).to_records()
+    transactions = records + [{"amount": 1.0}]
+    body = json.dumps(
+        {"transactions": transactions, "user_profile": sample_user_profile}, default=str
+    )
+
+    payload = parse_json(body.encode())
+
+    rows = payload["transactions"]
+    assert all(type(row) is TransactionRow for row in rows[:-1])
+    assert rows[-1] == {"amount": 1.0}
+    assert payload["user_profile"] == sample_user_profile
+
+    repeated = parse_json(json.dumps([LUNCH, {**LUNCH, "date": "2024-01-02"}]).encode())
+    assert repeated[0][2] is repeated[1][2]
+
+    batch = TransactionBatch.from_records(rows[:-1])
+    assert batch.to_records() == records
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        TransactionBatch.from_records(rows, loc=("body",))
+    assert excinfo.value.errors == [
+        {"loc": ["body", 4, "date"], "msg": "field required"}
+    ]
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        parse_json(b'{"transactions": [')
+    assert excinfo.value.errors[0]["msg"] == "JSON decode error"
+
+def test_analyze_endpoint_decodes_raw_body(sample_records, sample_user_profile):
+    client = TestClient(app)
+    records = TransactionBatch.from_records(sample_records).to_records()
+    body = json.dumps(
+        {"transactions": records, "user_profile": sample_user_profile}, default=str
+    )
+
+    response = client.post("/analyze", content=body, headers=JSON_HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["data"]["metrics"]["total_income"] == 5000.0
+    assert client.post("/analyze", content=b"not json").status_code == 422
+
+def test_analyze_endpoint_rejects_non_finite_amounts(sample_user_profile):
+    client = TestClient(app)
+    record = json.dumps({**LUNCH, "amount": "AMOUNT"}).replace('"AMOUNT"', "%s")
+    user_profile = json.dumps(sample_user_profile)
+    not_finite = "ensure this value is a finite number"
+
+    for amount, msg in [("Infinity", not_finite), ("-Infinity", not_finite),
+                        ("1e999", not_finite), ("NaN", "value is not a valid float")]:
+        transactions = f"[{record % 10}, {record % amount}]"
+        body = f'{{"transactions": {transactions}, "user_profile": {user_profile}}}'
+        response = client.post("/analyze", content=body, headers=JSON_HEADERS)
+        assert response.status_code == 422
+        assert response.json()["detail"] == [
+            {"loc": ["body", "transactions", 1, "amount"], "msg": msg}
+        ]
+
+def test_from_records_accepts_unix_timestamps():
+    dates = [1700000000, "2023-11-14T22:13:20+10:00", 1700000000123, 1700000000.5]
+
+    batch = TransactionBatch.from_records([{**LUNCH, "date": d} for d in dates])
+
+    assert list(batch.dates.astype(str)) == [
+        "2023-11-14T22:13:20.000000000", "2023-11-14T12:13:20.000000000",
+        "2023-11-14T22:13:20.123000000", "2023-11-14T22:13:20.500000000",
+    ]
+    with pytest.raises(TransactionValidationError) as excinfo:
+        TransactionBatch.from_records(
+            [{**LUNCH, "date": 1e30}, {**LUNCH, "date": 1700000000}]
+        )
+    assert excinfo.value.errors == [
+        {"loc": [0, "date"], "msg": "invalid datetime format"}
+    ]
+
+def test_to_records_round_trip(sample_records):
+    batch = TransactionBatch.from_records(sample_records)
+
+    round_trip = TransactionBatch.from_records(batch.to_records())
+    assert round_trip.to_records() == batch.to_records()
+
+def test_decode_analysis_request(sample_records, sample_user_profile):
+    transactions, user_profile = decode_analysis_request(
+        {"transactions": sample_records, "user_profile": sample_user_profile}
+    )
+
+    assert isinstance(transactions, TransactionBatch)
+    assert user_profile == sample_user_profile
+
+    with pytest.raises(TransactionValidationError) as excinfo:
+        decode_analysis_request({
+            "transactions": [], "user_profile": {**sample_user_profile, "age": "old"}
+        })
+
+    assert excinfo.value.errors[0]["loc"] == ["body", "user_profile", "age"]
+
+def test_advisor_accepts_batch(sample_records, sample_user_profile):
+    advisor = FinancialAdvisor()
+    batch = TransactionBatch.from_records(sample_records)
+
+    assert advisor.analyze_transactions(batch, sample_user_profile) == \
+        advisor.analyze_transactions(batch.to_records(), sample_user_profile)
+
+def test_data_processor_accepts_batch(sample_records):
+    batch = TransactionBatch.from_records(sample_records)
+    records = batch.to_records()
+
+    normalized = DataProcessor.normalize_categories(batch)
+    assert normalized.categories.tolist() == \
+        [t["category"] for t in DataProcessor.normalize_categories(records)]
+
+    assert DataProcessor.calculate_savings_rate(batch) == \
+        pytest.approx(DataProcessor.calculate_savings_rate(records))
+    assert DataProcessor.calculate_spending_patterns(normalized) == \
+        DataProcessor.calculate_spending_patterns(
+            DataProcessor.normalize_categories(records)
+        )
\ No newline at end of file